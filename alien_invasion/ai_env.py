@@ -0,0 +1,125 @@
+import numpy as np
+
+from settings import Settings
+from alien_invasion import AlienInvasion
+
+# actions: which way to move and whether to fire
+NOOP, LEFT, RIGHT, FIRE, LEFT_FIRE, RIGHT_FIRE = range(6)
+ACTION_MOVES = {
+    NOOP: (False, False, False),
+    LEFT: (True, False, False),
+    RIGHT: (False, True, False),
+    FIRE: (False, False, True),
+    LEFT_FIRE: (True, False, True),
+    RIGHT_FIRE: (False, True, True),
+}
+
+
+class AlienInvasionEnv:
+    """
+    A Gym-style environment around a headless game for bots and training agents,
+    observations are flat float32 arrays:
+    ship x, fleet direction, alien speed, fleet offset x and y,
+    then x, y of every bullet slot (-1 when empty), then the alien grid occupancy row by row
+    """
+
+    n_actions = len(ACTION_MOVES)
+
+    def __init__(self, settings=None, max_ticks=None, frame_skip=1):
+        """Build the game, pauses are skipped since nobody is watching"""
+        settings = settings or Settings()
+        settings.skip_pauses = True
+        self.game = AlienInvasion(headless=True, settings=settings)
+        self.settings = self.game.settings
+        self.max_ticks = max_ticks
+        self.frame_skip = frame_skip
+        self.ticks = 0
+
+        # the grid size is fixed for a given screen, so the observation size is too
+        self.game._start_game()
+        self.grid_size = self.game.aliens.alive.size
+        self.observation_size = 5 + 2 * self.settings.bullets_allowed + self.grid_size
+
+    def reset(self):
+        """Start a new game, return the first observation"""
+        self.game._start_game()
+        self.ticks = 0
+        return self.observation()
+
+    def step(self, action):
+        """Apply the action for frame_skip ticks, return (observation, reward, done, info)"""
+        reward, done, info = self._advance(action)
+        return self.observation(), reward, done, info
+
+    def _advance(self, action):
+        """Apply the action for frame_skip ticks, return (reward, done, info)"""
+        game = self.game
+        game.ship.moving_left, game.ship.moving_right, fire = ACTION_MOVES[int(action)]
+        score = game.stats.score
+        ships_left = game.stats.ships_left
+
+        if fire:
+            game._fire_bullet()
+        for _ in range(self.frame_skip):
+            game._update_world()
+            self.ticks += 1
+
+        done = not game.stats.game_active or (self.max_ticks is not None and self.ticks >= self.max_ticks)
+        info = {'level': game.stats.level, 'ships_left': game.stats.ships_left,
+                'ship_lost': game.stats.ships_left < ships_left}
+        return game.stats.score - score, done, info
+
+    def observation(self, out=None):
+        """Return the observation, written into out when it is given"""
+        if out is None:
+            out = np.empty(self.observation_size, dtype=np.float32)
+        game = self.game
+        width, height = self.settings.screen_width, self.settings.screen_height
+        fleet = game.aliens
+
+        out[0] = game.ship.x / width
+        out[1] = self.settings.fleet_direction
+        out[2] = self.settings.alien_speed
+        out[3] = fleet.offset_x / width
+        out[4] = fleet.offset_y / height
+
+        bullets = out[5:5 + 2 * self.settings.bullets_allowed]
+        bullets.fill(-1.0)
+        positions = [(bullet.rect.centerx / width, bullet.y / height) for bullet in game.bullets]
+        if positions:
+            bullets[:2 * len(positions)] = np.ravel(positions)
+
+        # the fleet keeps its alive flags as an array in grid order already
+        grid = out[5 + 2 * self.settings.bullets_allowed:]
+        grid.fill(0.0)
+        grid[:fleet.alive.size] = fleet.alive
+        return out
+
+
+class VectorEnv:
+    """A class to step N environments in one process, games that end are reset automatically"""
+
+    def __init__(self, n, settings_factory=Settings, **env_args):
+        """Build n environments with their own settings"""
+        self.envs = [AlienInvasionEnv(settings_factory(), **env_args) for _ in range(n)]
+        self.observations = np.zeros((n, self.envs[0].observation_size), dtype=np.float32)
+
+    def reset(self):
+        """Reset every environment, return the (n, observation_size) observations"""
+        for env, out in zip(self.envs, self.observations):
+            env.reset()
+            env.observation(out)
+        return self.observations
+
+    def step(self, actions):
+        """Step every environment with its action, return stacked observations, rewards, dones and infos"""
+        rewards = np.zeros(len(self.envs), dtype=np.float32)
+        dones = np.zeros(len(self.envs), dtype=bool)
+        infos = []
+        for i, (env, action) in enumerate(zip(self.envs, actions)):
+            rewards[i], dones[i], info = env._advance(action)
+            if dones[i]:
+                env.reset()
+            env.observation(self.observations[i])
+            infos.append(info)
+        return self.observations, rewards, dones, infos
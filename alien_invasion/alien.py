@@ -1,34 +1,32 @@
-
-import pygame
 from pygame.sprite import Sprite
 
 class Alien(Sprite):
-    """A class to represent a single alien in the fleet"""
+    """
+    A class to represent a single alien in the fleet,
+    the alien's position lives in the Fleet arrays and this sprite is just a view of it
+    """
 
-    def __init__(self, ai_game):
-        """Initialize the alien and set its starting position"""
+    def __init__(self, fleet, index):
+        """Initialize the alien as a view of one slot of the fleet"""
         super().__init__()  # inherit from sprite
-        self.screen = ai_game.screen
-        self.settings = ai_game.settings
+        self.fleet = fleet
+        self.index = index
 
-        # Load the alien image and set its rectangle attribute
-        self.image = pygame.image.load('images/alien.bmp')
+        # the image is shared by the whole fleet
+        self.image = fleet.image
         self.rect = self.image.get_rect()
+        self.sync()
 
-        # Start each new alien near the top left of the screen
-        self.rect.x = self.rect.width
-        self.rect.y = self.rect.height
-
-        # store the alien's exact horizontal position
-        self.x = float(self.rect.x)
+    @property
+    def x(self):
+        """the alien's exact horizontal position"""
+        return self.fleet.base_x[self.index] + self.fleet.offset_x
 
-    def check_edges(self):
-        """Return True if alien is at the edge of the screen"""
-        screen_rect = self.screen.get_rect()
-        if self.rect.right >= screen_rect.right or self.rect.left <= 0:
-            return True
+    def sync(self):
+        """Copy the alien's position from the fleet into its rect"""
+        self.rect.topleft = self.fleet.position(self.index)
 
-    def update(self):
-        """Move the alien to right or left"""
-        self.x += (self.settings.alien_speed * self.settings.fleet_direction)
-        self.rect.x = self.x
+    def kill(self):
+        """Remove the alien from the fleet as well as from any groups"""
+        self.fleet.kill([self.index])
+        super().kill()
@@ -1,138 +1,309 @@
+import os
 import sys
-from time import sleep
-import json
 
 import pygame
 
 from settings import Settings
+from settings_watcher import SettingsWatcher
 from game_stats import GameStats
 from scoreboard import Scoreboard
 from button import Button
 from ship import Ship
-from bullet import Bullet
-from alien import Alien
+from bullet_pool import BulletPool
+from fleet import Fleet
+from particles import ParticleSystem
+from assets import AssetManager
+from renderer import DirtyRenderer
+from text import TextRenderer
+from replay import InputRecorder
+from profiler import FrameProfiler, StartupTimer
+from input_handler import InputHandler
+from game_state import GameState, PLAYING, RESPAWN_PAUSE, GAME_OVER, LEVEL_TRANSITION
 
 class AlienInvasion():
     """Overall class to manage game assets and behavior"""
 
-    def __init__(self):
-        """Initialize the game and create game resources"""
-        pygame.init()
-        self.settings = Settings()
+    def __init__(self, headless=False, settings=None):
+        """
+        Initialize the game and create game resources,
+        a headless game simulates on an off-screen surface and never opens a window
+        """
+        self.headless = headless
+        self.startup = StartupTimer()   # how long each step below takes, printed with the profile
+        if headless:
+            # SDL's dummy video driver lets pygame run on machines with no display
+            os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+        # only the video subsystem is started here, pygame.init() would also open audio we never use,
+        # fonts and gamepads start when they are first needed
+        pygame.display.init()
+        self.settings = settings or Settings()
+        self.startup.mark('pygame')
+
+        if headless:
+            self.screen = pygame.Surface((self.settings.screen_width, self.settings.screen_height))
+        else:
+            self.screen = self._create_display()
+            pygame.display.set_caption("Alien Invasion")
+
+            # show an empty screen straight away while the rest of the game is built
+            self.screen.fill(self.settings.bg_color)
+            pygame.display.flip()
+        self.startup.mark('display')
+
+        # the simulation advances in fixed steps, the accumulator holds time not yet simulated
+        self.tick_length = 1 / self.settings.tick_rate
+        self.accumulator = 0.0
+        self.ticks = 0
 
-        self.screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
-        self.settings.screen_width = self.screen.get_rect().width
-        self.settings.screen_height = self.screen.get_rect().height
-        pygame.display.set_caption("Alien Invasion")
+        # every image is loaded once through the asset manager and shared,
+        # the files are read on a background thread while the objects that use them are set up
+        self.assets = AssetManager()
+        self.assets.preload(['images/ship.bmp', 'images/alien.bmp'])
+        self.text = TextRenderer(self.settings)   # fonts and rendered labels are cached here
 
-        # create an instance to store game statistics and create a scoreboard
+        # the state machine times pauses and transitions in ticks instead of sleeping
+        self.state = GameState(self)
+
+        # create an instance to store game statistics, the score file is read in the background
         self.stats = GameStats(self)
-        self.sb = Scoreboard(self)
+        self.startup.mark('stats')
 
         self.ship = Ship(self)   # the Ship class requires the AlienInvasion Class as input parameter
-        self.bullets = pygame.sprite.Group()   # bullets are many objects that we will control through a Group
-        self.aliens = pygame.sprite.Group()
+        self.bullets = BulletPool(self)   # bullets are many objects that we recycle through a pool
+        self.aliens = Fleet(self)   # the fleet keeps every alien in arrays rather than a Group
+        self.particles = ParticleSystem(self)   # explosions, kept in arrays like the fleet
 
         self._create_fleet()
+        self.startup.mark('sprites')
 
-        # Make the Play button
+        # create a scoreboard and the Play button, this is where the font is loaded
+        self.sb = Scoreboard(self)
         self.play_button = Button(self, 'Play')
+        self.startup.mark('text')
+
+        # keyboard and gamepad events are timestamped and mapped to actions, see Settings.key_bindings
+        self.input = InputHandler(self)
+
+        # the renderer redraws only what changed, see Settings.render_mode
+        self.renderer = DirtyRenderer(self)
+
+        # log every tick's input when Settings.record_path is set
+        self.recorder = InputRecorder(self) if self.settings.record_path else None
+
+        # times every part of the loop when Settings.profile is on
+        self.profiler = FrameProfiler(self)
+
+        # streams every tick's state to local clients when Settings.telemetry_port is set
+        self.telemetry = None
+        if self.settings.telemetry_port is not None:
+            # imported here so a game without telemetry doesn't load asyncio
+            from telemetry import TelemetryServer
+            self.telemetry = TelemetryServer(self)
+
+        # applies edits to the settings file while the game runs when Settings.hot_reload is on
+        self.watcher = None
+        if self.settings.hot_reload and self.settings.config_path:
+            self.watcher = SettingsWatcher(self)
+        self.startup.mark('services')
+
+    def _create_display(self):
+        """Open the window or fullscreen display described by the display settings"""
+        flags = pygame.FULLSCREEN if self.settings.display_mode == 'fullscreen' else 0
+        if self.settings.scale_to_display:
+            # the game always runs at the logical screen size and SDL scales every frame
+            # to the display in one step, keeping the aspect ratio, so all displays get the same fleet
+            size = (self.settings.screen_width, self.settings.screen_height)
+            try:
+                return pygame.display.set_mode(size, flags | pygame.SCALED, vsync=int(self.settings.vsync))
+            except pygame.error:
+                # not every video driver can sync, run without it rather than not at all
+                return pygame.display.set_mode(size, flags | pygame.SCALED)
+
+        # without scaling the game runs at the display's own resolution
+        size = (0, 0) if flags else (self.settings.screen_width, self.settings.screen_height)
+        screen = pygame.display.set_mode(size, flags)
+        self.settings.screen_width = screen.get_rect().width
+        self.settings.screen_height = screen.get_rect().height
+        return screen
 
     def run_game(self):
         """Start the main loop of the game"""
+        clock = pygame.time.Clock()
         while True:   # main game loop is run indefinetely until the sys.exit() command
-            self._check_events()   # helper method to watch for keyboard and mouse events
-
-            if self.stats.game_active:
+            # don't spin a whole CPU core while waiting on the Play screen
+            frame_rate = 0 if self.stats.game_active else self.settings.idle_frame_rate
+            frame_time = clock.tick(frame_rate) / 1000   # seconds since the last pass
+            with self.profiler.section('_check_events'):
+                self._check_events()   # helper method to watch for keyboard and mouse events
+            if self.watcher:
+                self.watcher.check()
+            alpha = self.advance(frame_time)
+
+            if not self.headless:
+                with self.profiler.section('_update_screen'):
+                    if self._update_screen(alpha):  # helper method to update the screen on every pass
+                        self.input.frame_shown()
+                if 'first_frame' not in self.startup.steps:
+                    self.startup.mark('first_frame')
+                # presenting can block for a while, so collect what arrived meanwhile with its own timestamp
+                self.input.poll()
+            self.profiler.end_frame()
+
+    def advance(self, frame_time):
+        """
+        Run as many fixed ticks as fit in the elapsed time,
+        return how far (0 to 1) we are into the next tick so drawing can interpolate
+        """
+        # clamp long frames so a stall doesn't make us simulate forever to catch up
+        self.accumulator += min(frame_time, self.settings.max_frame_time)
+
+        # each tick applies the input that arrived during the stretch of real time it stands for
+        for tick_end in self.input.tick_ends(int(self.accumulator // self.tick_length)):
+            with self.profiler.section('_check_events'):
+                for event in self.input.due(tick_end):
+                    self._handle_event(event)
+            self._update_world()
+            self.accumulator -= self.tick_length
+        return self.accumulator / self.tick_length
+
+    def step(self, events=()):
+        """Apply the given input events and advance the simulation by exactly one tick"""
+        with self.profiler.section('_check_events'):
+            for event in events:
+                self._handle_event(event)
+        self._update_world()
+        self.profiler.end_frame()
+
+    def _update_world(self):
+        """Advance the state of the game by one fixed tick"""
+        if self.recorder:
+            self.recorder.record_tick()
+        self.state.update()
+        self.particles.update()   # explosions keep fading during pauses
+        if self.state.playing:
+            with self.profiler.section('ship.update'):
                 self.ship.update()     # update the position of the ship based on key presses
+            with self.profiler.section('_update_bullets'):
                 self._update_bullets()
+            with self.profiler.section('_update_aliens'):
                 self._update_aliens()
-
-            self._update_screen()  # helper method to update the screen on every pass
+        self.ticks += 1
+        if self.telemetry and self.ticks % self.settings.telemetry_interval == 0:
+            self.telemetry.publish()
 
     def _check_events(self):   # helper method that only affects the run_game() method
-        """Respond to key presses and mouse events"""
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                sys.exit()   # quit the python interpreter when q is pressed
-            elif event.type == pygame.KEYDOWN:
-                self._check_keydown_events(event)
-            elif event.type == pygame.KEYUP:
-                self._check_keyup_events(event)
-            elif event.type == pygame.MOUSEBUTTONDOWN:
-                mouse_pos = pygame.mouse.get_pos()
-                self._check_play_button(mouse_pos)
-
-    def _check_keydown_events(self, event):
-        """respond to key presses"""
-        if event.key == pygame.K_RIGHT:
-            self.ship.moving_right = True  # set the moving right flag to True
-        elif event.key == pygame.K_LEFT:
-            self.ship.moving_left = True  # set the moving left flag to True
-        elif event.key == pygame.K_q:
-            self._save_high_score(self.stats.high_score)
-            sys.exit()  # exit when q is pressed
-        elif event.key == pygame.K_SPACE:
+        """Collect key presses, gamepad and mouse events, they are handled at the tick they belong to"""
+        self.input.poll()
+
+    def _handle_event(self, event):
+        """Respond to a single input event"""
+        if event.type == pygame.QUIT:
+            self._quit()
+        elif event.type == pygame.MOUSEBUTTONDOWN:
+            self._check_play_button(event.pos)
+        else:
+            for action, pressed in self.input.actions(event):
+                self._handle_action(action, pressed)
+
+    def _handle_action(self, action, pressed):
+        """Respond to an action being pressed or released, whichever device it came from"""
+        if action == 'right':
+            self.ship.moving_right = pressed  # move right while the action is held
+        elif action == 'left':
+            self.ship.moving_left = pressed  # move left while the action is held
+        elif not pressed:
+            return
+        elif action == 'quit':
+            self._quit()  # exit when q is pressed
+        elif action == 'fire':
             self._fire_bullet()
-
-    def _check_keyup_events(self, event):
-        """respond to key presses"""
-        if event.key == pygame.K_RIGHT:
-            self.ship.moving_right = False  # set the moving right flag to False when the Key is released
-        elif event.key == pygame.K_LEFT:
-            self.ship.moving_left = False  # set the moving left flag to False when Key is released
+        elif action == 'play' and not self.stats.game_active:
+            self._start_game()
 
     def _fire_bullet(self):
-        """Create a new bullet and add it to the bullet group"""
-        if len(self.bullets) < self.settings.bullets_allowed:
-            new_bullet = Bullet(self)
-            self.bullets.add(new_bullet)
+        """Fire a bullet from the pool"""
+        if self.state.playing and len(self.bullets) < self.settings.bullets_allowed:
+            self.bullets.fire(self.ship.rect)
+            if self.recorder:
+                self.recorder.note_fire()
+
+    def _quit(self):
+        """Save the high score, the recording and profile if there are any and quit the python interpreter"""
+        self.stats.save_high_score()
+        self.stats.store.flush()   # wait for the writer thread so the file is complete
+        if self.recorder:
+            self.recorder.save(self.settings.record_path)
+        self.profiler.finish()
+        if self.telemetry:
+            self.telemetry.close()
+        sys.exit()
 
     def _check_play_button(self, mouse_pos):
         """start a new game when the player hits play"""
         button_clicked = self.play_button.rect.collidepoint(mouse_pos)
         if button_clicked and not self.stats.game_active:
-            # reset the game's dynamic settings
-            self.settings.initialize_dynamic_settings()
-
-            # reset game statistics
-            self.stats.reset_stats()
-            self.stats.game_active = True
-            self.sb.prep_score()
-            self.sb.prep_level()
-            self.sb.prep_ships()
-
-            # get rid of any remaining aliens or bullets
-            self.aliens.empty()
-            self.bullets.empty()
-
-            # create a new fleet and center the ship
-            self._create_fleet()
-            self.ship.center_ship()
+            self._start_game()
+
+    def settings_changed(self, changed):
+        """Bring the running game in line with settings that were just reloaded"""
+        self.settings.set_level(self.stats.level)
+        if 'key_bindings' in changed:
+            self.input.load_bindings()
+
+        # the background color may have changed, so redraw the scoreboard and the whole screen
+        self.sb.prep_score()
+        self.sb.prep_high_score()
+        self.sb.prep_level()
+        self.renderer.invalidate()
+
+    def _start_game(self):
+        """Reset everything and start a new game"""
+        if self.recorder:
+            self.recorder.note_play()
+
+        # reset the game's dynamic settings
+        self.settings.initialize_dynamic_settings()
+
+        # reset game statistics
+        self.stats.reset_stats()
+        self.stats.game_active = True
+        self.state.enter(PLAYING)
+        self.sb.prep_score()
+        self.sb.prep_level()
+        self.sb.prep_ships()
+
+        # get rid of any remaining aliens, bullets or explosions
+        self.aliens.empty()
+        self.bullets.empty()
+        self.particles.empty()
+
+        # create a new fleet and center the ship
+        self._create_fleet()
+        self.ship.center_ship()
 
-            # hide the mouse cursor
+        # hide the mouse cursor
+        if not self.headless:
             pygame.mouse.set_visible(False)
 
     def _update_bullets(self):
         """Update the position of bullets and get rid of the old bullets"""
-        # update bullet positions
+        # update bullet positions, bullets that have disappeared go back into the pool
         self.bullets.update()
 
-        # get rid of bullets that have disappeared
-        for bullet in self.bullets.copy():
-            if bullet.rect.bottom <= 0:
-                self.bullets.remove(bullet)
-
-        self._check_bullet_alien_collision()
+        with self.profiler.section('_check_bullet_alien_collision'):
+            self._check_bullet_alien_collision()
 
     def _check_bullet_alien_collision(self):
         """check whether bullet has hit aliens and whether fleet is empty, then repopulate"""
         # remove any bullets and aliens that have collided
-        collisions = pygame.sprite.groupcollide(self.bullets, self.aliens, True, True)
+        collisions = self.aliens.collide_bullets(self.bullets)
 
         if collisions:
             for aliens in collisions.values():
                 self.stats.score += self.settings.alien_points * len(aliens)
+                for index in aliens:
+                    x, y = self.aliens.position(index)
+                    self.particles.explode(x + self.aliens.alien_width / 2, y + self.aliens.alien_height / 2)
             self.sb.prep_score()
             self.sb.check_high_score()
 
@@ -142,12 +313,14 @@ class AlienInvasion():
             # destroy existing bullets and create new fleet
             self.bullets.empty()
             self._create_fleet()
-            self.settings.increase_speed()   # increase difficulty
-
-            # Increase Level
+            # Increase Level, and the difficulty with it
             self.stats.level += 1
+            self.settings.set_level(self.stats.level)
             self.sb.prep_level()
 
+            # give the player a moment before the next wave starts moving
+            self.state.enter(LEVEL_TRANSITION, self.settings.level_pause)
+
     def _update_aliens(self):
         """
         check if the fleet is at an edge,
@@ -157,7 +330,7 @@ class AlienInvasion():
         self.aliens.update()
 
         # Look for alien-ship collisions
-        if pygame.sprite.spritecollideany(self.ship, self.aliens):
+        if self.aliens.collide_rect(self.ship.rect):
             self._ship_hit()
 
         # look for aliens hitting the bottom of the screen
@@ -170,6 +343,9 @@ class AlienInvasion():
             self.stats.ships_left -= 1
             self.sb.prep_ships()
 
+            # save the high score now in case the game never exits properly
+            self.stats.save_high_score()
+
             # get rid of any remaining aliens or bullets
             self.aliens.empty()
             self.bullets.empty()
@@ -178,90 +354,97 @@ class AlienInvasion():
             self._create_fleet()
             self.ship.center_ship()
 
-            # Pause
-            sleep(0.5)
+            # Pause, the loop keeps running while the pause counts down
+            self.state.enter(RESPAWN_PAUSE, self.settings.respawn_pause)
         else:
             self.stats.game_active = False
-            pygame.mouse.set_visible(True)
+            self.stats.record_game()
+            self.state.enter(GAME_OVER, self.settings.game_over_pause)
+            if not self.headless:
+                pygame.mouse.set_visible(True)
 
     def _check_aliens_bottom(self):
         """check if aliens hit the bottom, if yes start over"""
-        screen_rect = self.screen.get_rect()
-        for alien in self.aliens.sprites():
-            if alien.rect.bottom >= screen_rect.bottom:
-                # Treat this the same as if the ship was hit
-                self._ship_hit()
-                break
+        if self.aliens.reached_bottom():
+            # Treat this the same as if the ship was hit
+            self._ship_hit()
 
     def _create_fleet(self):
         """Create the fleet of ALiens"""
-        # Create an alien and find the number of aliens in a row
+        # find the number of aliens in a row
         # spacing between each alien is equal to one alien width
-        alien = Alien(self)   # u create the alien using the class u wrote
-        alien_width, alien_height = alien.rect.size
+        alien_width, alien_height = self.aliens.alien_width, self.aliens.alien_height
         available_space_x = self.settings.screen_width - (2 * alien_width)
         number_aliens_x = available_space_x // (2 * alien_width)
 
         # determine the number of rows of aliens that fit in the screen
         ship_height = self.ship.rect.height
         available_space_y = (self.settings.screen_height - (3 * alien_height) - ship_height)
-        number_rows = available_space_y // (4 * alien_height)
+        number_rows = self.settings.fleet_rows or available_space_y // (4 * alien_height)
+        # rows are two alien heights apart, more rows than fit would start the fleet on top of the ship
+        number_rows = min(number_rows, available_space_y // (2 * alien_height))
 
         # create the full fleet of aliens
-        for row_number in range(number_rows):
-            for alien_number in range(number_aliens_x):
-                # create an alien and place it in the row
-                self._create_alien(alien_number, row_number)
-
-    def _create_alien(self, alien_number, row_number):
-        """create an alien and place it in the row"""
-        alien = Alien(self)
-        alien_width, alien_height = alien.rect.size
-        alien.x = alien_width + 2 * alien_width * alien_number
-        alien.rect.x = alien.x
-        alien.rect.y = alien.rect.height + 2 * alien.rect.height * row_number
-        self.aliens.add(alien)  # alien added to the Group
+        self.aliens.create(number_rows, number_aliens_x)
 
     def _check_fleet_edges(self):
         """Respond appropriately if any aliens reached an edge"""
-        for alien in self.aliens.sprites():
-            if alien.check_edges():
-                self._change_fleet_direction()
-                break
+        if self.aliens.check_edges():
+            self._change_fleet_direction()
 
     def _change_fleet_direction(self):
         """frop the entire fleet and change its direction"""
-        for alien in self.aliens.sprites():
-            alien.rect.y += self.settings.fleet_drop_speed
+        self.aliens.drop()
         self.settings.fleet_direction *= -1
 
-    def _save_high_score(self, high_score):
-        """Save the high score to a txt file"""
-        high_score_file = 'high_score.json'
-        with open(high_score_file, 'w') as f:
-            json.dump(high_score, f)
-
+    def _update_screen(self, alpha=1.0):
+        """
+        update images on the screen, and flip to the new screen,
+        alpha is how far we are between the last tick and the next one,
+        return True if a new frame reached the display
+        """
+        if self.settings.render_mode == 'dirty':
+            return self.renderer.render(alpha)
 
-    def _update_screen(self):
-        """update images on the screen, and flip to the new screen"""
         self.screen.fill((self.settings.bg_color))  # here the color is set
-        self.ship.blitme()  # redraw the current position of the ship
-        for bullet in self.bullets.sprites():
-            bullet.draw_bullet()
-        self.aliens.draw(self.screen)
-
+        self.draw_moving(alpha)
+        self.draw_static()
+        pygame.display.flip()  # make the most recently drawn screen visible
+        return True
+
+    def draw_moving(self, alpha):
+        """Draw the ship, bullets, aliens and explosions, return the rects drawn to"""
+        rects = [self.ship.blitme(alpha)]  # redraw the current position of the ship
+        for bullet in self.bullets:
+            rects.append(bullet.draw_bullet(alpha))
+        fleet_rect = self.aliens.draw(self.screen, alpha)
+        if fleet_rect:
+            rects.append(fleet_rect)
+
+        # every particle is drawn in one pass over the screen's pixels
+        particles_rect = self.particles.draw(self.screen, alpha)
+        if particles_rect:
+            rects.append(particles_rect)
+
+        # the profiler overlay changes every frame, so it is drawn with the moving things
+        overlay_rect = self.profiler.draw_overlay(self.screen, self.text)
+        if overlay_rect:
+            rects.append(overlay_rect)
+        return rects
+
+    def draw_static(self):
+        """Draw the scoreboard and the play button, return the rects drawn to"""
         # Draw the score information
-        self.sb.show_score()
+        rects = self.sb.show_score()
 
         # Draw the play button if the game is inactive
         if not self.stats.game_active:
-            self.play_button.draw_button()
-
-        pygame.display.flip()  # make the most recently drawn screen visible
+            rects.append(self.play_button.draw_button())
+        return rects
 
 
 if __name__ == '__main__':
-    # Make a game instance and run it
-    ai = AlienInvasion()
+    # Make a game instance and run it, settings.json next to the game overrides the default settings
+    ai = AlienInvasion(settings=Settings.load('settings.json') if os.path.exists('settings.json') else None)
     ai.run_game()
 
@@ -0,0 +1,58 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pygame
+
+class AssetManager:
+    """A class to load every image only once and hand out the shared surface"""
+
+    def __init__(self):
+        """Initialize an empty cache"""
+        self.images = {}
+        self.loading = {}   # path -> future of an image file being read in the background, see preload()
+        self.executor = None
+
+        # cache statistics
+        self.hits = 0
+        self.misses = 0
+        self.bytes = 0
+
+    def preload(self, paths):
+        """Start reading image files on a background thread, image() picks them up when they are asked for"""
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='assets')
+        for path in paths:
+            if path not in self.loading:
+                self.loading[path] = self.executor.submit(pygame.image.load, path)
+
+    def image(self, path, alpha=False, scale=1.0):
+        """
+        Return the image at path, loading it on the first request,
+        use alpha=True for images with per-pixel transparency
+        and scale to get a resized copy that is also only made once
+        """
+        key = (path, alpha, scale)
+        if key in self.images:
+            self.hits += 1
+            return self.images[key]
+
+        self.misses += 1
+        if scale == 1.0:
+            # a preloaded file is usually read by now, converting it has to happen on this thread
+            image = self.loading.pop(path).result() if path in self.loading else pygame.image.load(path)
+        else:
+            original = self.image(path, alpha)
+            size = (max(1, round(original.get_width() * scale)), max(1, round(original.get_height() * scale)))
+            image = pygame.transform.scale(original, size)
+
+        # match the display's pixel format so blits don't convert on every frame
+        # convert needs a display mode, a headless game keeps the image as loaded
+        if pygame.display.get_surface() is not None:
+            image = image.convert_alpha() if alpha else image.convert()
+
+        self.bytes += image.get_pitch() * image.get_height()
+        self.images[key] = image
+        return image
+
+    def stats(self):
+        """Return the cache statistics as a dict"""
+        return {'hits': self.hits, 'misses': self.misses, 'bytes': self.bytes, 'images': len(self.images)}
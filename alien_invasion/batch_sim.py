@@ -0,0 +1,179 @@
+import os
+import json
+import random
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pygame
+
+from settings import Settings
+
+# settings the batch runner can put on the grid, with the type their values are parsed as
+TUNABLE = {
+    'speedup_scale': float,
+    'score_scale': float,
+    'fleet_drop_speed': int,
+    'bullets_allowed': int,
+    'ship_limit': int,
+}
+
+
+def sweep_bot(game, tick, rng):
+    """A bot that sweeps left and right across the screen and fires every 10 ticks"""
+    events = []
+    if tick % 240 == 0:
+        going_right = (tick // 240) % 2 == 0
+        events.append(pygame.event.Event(pygame.KEYUP, key=pygame.K_LEFT if going_right else pygame.K_RIGHT))
+        events.append(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_RIGHT if going_right else pygame.K_LEFT))
+    if tick % 10 == 0:
+        events.append(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_SPACE))
+    return events
+
+
+def tracker_bot(game, tick, rng):
+    """A bot that moves under the lowest live alien and fires, with a random hesitation"""
+    fleet = game.aliens
+    live = np.flatnonzero(fleet.alive)
+    if not live.size or rng.random() < 0.2:
+        return []
+    target = live[np.argmax(fleet.y[live])]
+
+    # aim where the alien will be by the time a bullet gets there
+    ship = game.ship
+    settings = game.settings
+    flight_ticks = (ship.rect.top - fleet.y[target] - fleet.alien_height) / settings.bullet_speed
+    target_x = (fleet.x[target] + fleet.alien_width / 2
+                + settings.alien_speed * settings.fleet_direction * flight_ticks)
+
+    go_right = target_x > ship.rect.centerx + 4
+    go_left = target_x < ship.rect.centerx - 4
+    events = []
+    if go_right != ship.moving_right:
+        events.append(pygame.event.Event(pygame.KEYDOWN if go_right else pygame.KEYUP, key=pygame.K_RIGHT))
+    if go_left != ship.moving_left:
+        events.append(pygame.event.Event(pygame.KEYDOWN if go_left else pygame.KEYUP, key=pygame.K_LEFT))
+    if not (go_left or go_right):
+        events.append(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_SPACE))
+    return events
+
+
+BOTS = {'sweep': sweep_bot, 'tracker': tracker_bot}
+
+
+def play_game(overrides, bot, seed, max_ticks):
+    """Play one headless game to the end or to max_ticks, return how far the bot got"""
+    # imported here so every worker process sets up its own pygame
+    from alien_invasion import AlienInvasion
+
+    settings = Settings()
+    settings.skip_pauses = True
+    for name, value in overrides.items():
+        setattr(settings, name, value)
+    game = AlienInvasion(headless=True, settings=settings)
+    game._start_game()
+
+    rng = random.Random(seed)
+    bot_player = BOTS[bot]
+    tick = 0
+    while tick < max_ticks and game.stats.game_active:
+        game.step(bot_player(game, tick, rng))
+        tick += 1
+    return {'level': game.stats.level, 'score': game.stats.score, 'survival_ticks': tick,
+            'game_over': not game.stats.game_active}
+
+
+def make_jobs(grid, repeats, bot, max_ticks):
+    """Return one job for every combination of grid values and every repeat"""
+    names = sorted(grid)
+    jobs = []
+    for values in itertools.product(*(grid[name] for name in names)):
+        overrides = dict(zip(names, values))
+        for repeat in range(repeats):
+            job_id = json.dumps([overrides, bot, repeat, max_ticks], sort_keys=True)
+            jobs.append((job_id, overrides, repeat))
+    return jobs
+
+
+def completed_jobs(path):
+    """Return the results already in the output file, so an interrupted batch can resume"""
+    done = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                # the last line may have been cut off when the batch was killed
+                try:
+                    result = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                done[result['job']] = result
+    return done
+
+
+def run_batch(grid, path, repeats=1, bot='tracker', max_ticks=50000, workers=None):
+    """
+    Play every job of the grid on all cores, appending each result to path as it finishes,
+    return the results of every job including those from earlier runs
+    """
+    jobs = make_jobs(grid, repeats, bot, max_ticks)
+    results = completed_jobs(path)
+    pending = [job for job in jobs if job[0] not in results]
+
+    with open(path, 'a') as f, ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        # the repeat number doubles as the bot's random seed
+        futures = {executor.submit(play_game, overrides, bot, repeat, max_ticks): (job_id, overrides)
+                   for job_id, overrides, repeat in pending}
+        for future in as_completed(futures):
+            job_id, overrides = futures[future]
+            result = {'job': job_id, 'settings': overrides, **future.result()}
+            f.write(json.dumps(result) + '\n')
+            f.flush()
+            results[job_id] = result
+    return [results[job[0]] for job in jobs]
+
+
+def aggregate(results):
+    """Average the results of every settings combination"""
+    groups = {}
+    for result in results:
+        groups.setdefault(json.dumps(result['settings'], sort_keys=True), []).append(result)
+
+    summary = []
+    for key, group in groups.items():
+        summary.append({
+            'settings': json.loads(key),
+            'games': len(group),
+            'mean_level': sum(r['level'] for r in group) / len(group),
+            'mean_score': sum(r['score'] for r in group) / len(group),
+            'mean_survival_ticks': sum(r['survival_ticks'] for r in group) / len(group),
+        })
+    return summary
+
+
+def parse_param(text):
+    """Parse name=value,value,... into the setting name and its list of values"""
+    name, _, values = text.partition('=')
+    if name not in TUNABLE:
+        raise argparse.ArgumentTypeError(f"{name} is not one of {', '.join(TUNABLE)}")
+    return name, [TUNABLE[name](value) for value in values.split(',')]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Play many headless games over a grid of settings")
+    parser.add_argument('--param', type=parse_param, action='append', default=[],
+                        help="a setting and the values to try, e.g. speedup_scale=1.05,1.1,1.2")
+    parser.add_argument('--out', default='batch_results.jsonl', help="results file, reused to resume")
+    parser.add_argument('--repeats', type=int, default=1, help="games per settings combination")
+    parser.add_argument('--bot', choices=BOTS, default='tracker')
+    parser.add_argument('--max-ticks', type=int, default=50000, help="longest a single game may run")
+    parser.add_argument('--workers', type=int, help="worker processes, all cores by default")
+    args = parser.parse_args()
+
+    summary = aggregate(run_batch(dict(args.param), args.out, args.repeats, args.bot,
+                                  args.max_ticks, args.workers))
+    with open(args.out + '.summary.json', 'w') as f:
+        json.dump(summary, f, indent=4)
+    for row in summary:
+        print(f"{row['settings']}  level {row['mean_level']:.2f}  score {row['mean_score']:.0f}  "
+              f"survival {row['mean_survival_ticks']:.0f} ticks")
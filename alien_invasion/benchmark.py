@@ -0,0 +1,134 @@
+import argparse
+import json
+import tracemalloc
+from time import perf_counter
+
+import pygame
+
+from settings import Settings
+from alien_invasion import AlienInvasion
+
+# every scenario is a set of Settings overrides, plus how often the scripted player fires
+SCENARIOS = {
+    'default': {},
+    'full_hd': {'screen_width': 1920, 'screen_height': 1080},
+    'tiny_aliens_4k': {'screen_width': 3840, 'screen_height': 2160, 'alien_scale': 0.25},
+    'deep_fleet': {'screen_width': 1920, 'screen_height': 1080, 'alien_scale': 0.5, 'fleet_rows': 20},
+    'bullet_hell': {'bullets_allowed': 300, 'base_bullet_speed': 6.0, 'fire_every': 1},
+}
+
+
+def make_game(overrides):
+    """Build a headless game with the scenario's settings"""
+    settings = Settings()
+    settings.skip_pauses = True
+    for name, value in overrides.items():
+        if name != 'fire_every':
+            setattr(settings, name, value)
+    return AlienInvasion(headless=True, settings=settings)
+
+
+def scripted_input(game, tick, fire_every):
+    """Return the events of a scripted player that sweeps left and right and keeps firing"""
+    events = []
+    if not game.stats.game_active:
+        events.append(pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=game.play_button.rect.center, button=1))
+    if tick % 240 == 0:
+        going_right = (tick // 240) % 2 == 0
+        events.append(pygame.event.Event(pygame.KEYUP, key=pygame.K_LEFT if going_right else pygame.K_RIGHT))
+        events.append(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_RIGHT if going_right else pygame.K_LEFT))
+    if tick % fire_every == 0:
+        events.append(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_SPACE))
+    return events
+
+
+def play(game, ticks, fire_every, render):
+    """Run the scripted game, return the time every frame took"""
+    frame_times = []
+    for tick in range(ticks):
+        start = perf_counter()
+        events = scripted_input(game, tick, fire_every)
+        if not game.stats.game_active:
+            game.step(events[:1])
+            events = events[1:]
+        game.step(events)
+        if render:
+            # draw to the off-screen surface to include the drawing cost
+            game.screen.fill(game.settings.bg_color)
+            game.draw_moving(1.0)
+            game.draw_static()
+        frame_times.append(perf_counter() - start)
+    return frame_times
+
+
+def percentile(sorted_times, p):
+    """Return the p-th percentile of a sorted list of times in milliseconds"""
+    return sorted_times[min(len(sorted_times) - 1, len(sorted_times) * p // 100)] * 1000
+
+
+def run_scenario(overrides, ticks, render):
+    """Run one scenario, return its ticks/sec, frame time percentiles and peak memory"""
+    fire_every = overrides.get('fire_every', 10)
+
+    game = make_game(overrides)
+    frame_times = play(game, ticks, fire_every, render)
+
+    # memory is measured on a separate run because tracemalloc slows everything down
+    tracemalloc.start()
+    game = make_game(overrides)
+    play(game, ticks, fire_every, render)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    frame_times.sort()
+    return {
+        'ticks_per_sec': ticks / sum(frame_times),
+        'p50_ms': percentile(frame_times, 50),
+        'p95_ms': percentile(frame_times, 95),
+        'p99_ms': percentile(frame_times, 99),
+        'peak_memory_kb': peak / 1024,
+        'aliens': game.aliens.alive.size,
+    }
+
+
+def compare(results, baseline, threshold):
+    """Print how every scenario changed against the baseline, return True if any regressed"""
+    regressed = False
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        old = baseline[name]['ticks_per_sec']
+        change = (result['ticks_per_sec'] - old) / old
+        flag = ''
+        if change < -threshold:
+            flag = '  REGRESSION'
+            regressed = True
+        print(f"{name:16} {old:10.0f} -> {result['ticks_per_sec']:10.0f} ticks/s ({change:+.1%}){flag}")
+    return regressed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark Alien Invasion headlessly")
+    parser.add_argument('scenarios', nargs='*', default=list(SCENARIOS), help="scenarios to run")
+    parser.add_argument('--ticks', type=int, default=3000, help="ticks to simulate per scenario")
+    parser.add_argument('--no-render', action='store_true', help="skip drawing to the off-screen surface")
+    parser.add_argument('--save', help="write the results as a baseline json file")
+    parser.add_argument('--compare', help="compare against a baseline json file")
+    parser.add_argument('--threshold', type=float, default=0.1, help="slowdown counted as a regression")
+    args = parser.parse_args()
+
+    results = {}
+    for name in args.scenarios:
+        results[name] = run_scenario(SCENARIOS[name], args.ticks, not args.no_render)
+        result = results[name]
+        print(f"{name:16} {result['ticks_per_sec']:10.0f} ticks/s  p50 {result['p50_ms']:.3f}ms  "
+              f"p95 {result['p95_ms']:.3f}ms  p99 {result['p99_ms']:.3f}ms  "
+              f"peak {result['peak_memory_kb']:.0f}KB  aliens {result['aliens']}")
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=4)
+    if args.compare:
+        with open(args.compare) as f:
+            if compare(results, json.load(f), args.threshold):
+                raise SystemExit(1)
@@ -1,31 +1,40 @@
 import pygame
-from pygame.sprite import Sprite
 
-class Bullet(Sprite):    # parent class Sprite used for multiple objects in a game, like bullets
-    """A class to manage bullets fired from the ship"""
+class Bullet:
+    """A class to manage bullets fired from the ship, bullets are recycled through the BulletPool"""
+
+    # bullets are created in bulk and recycled, so keep them small
+    __slots__ = ('screen', 'settings', 'color', 'rect', 'y', 'prev_y')
 
     def __init__(self, ai_game):
-        """create bullet object at the ship's current location"""
-        super().__init__()
+        """create a bullet object, it is placed when fired"""
         self.screen = ai_game.screen
         self.settings = ai_game.settings
         self.color = self.settings.bullet_color
 
-        # create the bullet rectangle at 0,0 and then set the current position
+        # create the bullet rectangle at 0,0, fire() sets the current position
         self.rect = pygame.Rect(0, 0, self.settings.bullet_width, self.settings.bullet_height)
-        self.rect.midtop = ai_game.ship.rect.midtop
+        self.y = 0.0
+        self.prev_y = 0.0
+
+    def fire(self, ship_rect):
+        """place the bullet at the ship's current location"""
+        self.rect.midtop = ship_rect.midtop
 
         # store the bullet's position as a decimal value
         self.y = float(self.rect.y)
+        self.prev_y = self.y
 
     def update(self):
         """Move the bullet up the screen"""
         # update the decimal position of the bullet
+        self.prev_y = self.y
         self.y -= self.settings.bullet_speed
         # update the rect position
         self.rect.y = self.y
 
-    def draw_bullet(self):
-        """draw the bullet to the screen"""
-        pygame.draw.rect(self.screen, self.color, self.rect)
-
+    def draw_bullet(self, alpha=1.0):
+        """draw the bullet to the screen, interpolated between the last two ticks"""
+        draw_rect = self.rect.copy()
+        draw_rect.y = round(self.prev_y + (self.y - self.prev_y) * alpha)
+        return pygame.draw.rect(self.screen, self.color, draw_rect)
@@ -0,0 +1,55 @@
+from bullet import Bullet
+
+class BulletPool:
+    """
+    A class to manage the bullets in flight like a sprite Group does,
+    bullets that are culled or hit are kept and reused for the next shots instead of being thrown away
+    """
+
+    def __init__(self, ai_game):
+        """Initialize the pool with Settings.bullet_pool_size bullets ready to fire"""
+        self.ai_game = ai_game
+        self.active = []   # bullets in flight, in the order they were fired
+        self.free = [Bullet(ai_game) for _ in range(ai_game.settings.bullet_pool_size)]
+
+    def __len__(self):
+        """Number of bullets in flight"""
+        return len(self.active)
+
+    def __iter__(self):
+        """Iterate over the bullets in flight"""
+        return iter(self.active)
+
+    def sprites(self):
+        """Return a copy of the list of bullets in flight"""
+        return list(self.active)
+
+    def fire(self, ship_rect):
+        """Take a bullet from the pool and fire it from the ship"""
+        bullet = self.free.pop() if self.free else Bullet(self.ai_game)
+        bullet.fire(ship_rect)
+        self.active.append(bullet)
+        return bullet
+
+    def remove(self, bullet):
+        """Put a bullet in flight back into the pool"""
+        self.active.remove(bullet)
+        self.free.append(bullet)
+
+    def empty(self):
+        """Put every bullet in flight back into the pool"""
+        self.free.extend(self.active)
+        self.active.clear()
+
+    def update(self):
+        """Move every bullet, and put the ones that left the top of the screen back into the pool"""
+        # compact the active list in place rather than iterating over a copy
+        kept = 0
+        for bullet in self.active:
+            bullet.update()
+            if bullet.rect.bottom <= 0:
+                self.free.append(bullet)
+            else:
+                self.active[kept] = bullet
+                kept += 1
+        del self.active[kept:]
@@ -12,7 +12,7 @@ class Button:
         self.width, self.height = 200, 50
         self.button_color = (0, 255, 0)
         self.text_color = (255, 255, 255)
-        self.font = pygame.font.SysFont(None, 48)
+        self.text = ai_game.text
 
         # build the buttons rectangle object and center it
         self.rect = pygame.Rect(0, 0, self.width, self.height)
@@ -23,11 +23,12 @@ class Button:
 
     def _prep_msg(self, msg):
         """Turn the msg into rendered image and center the text on the button"""
-        self.msg_image = self.font.render(msg, True, self.text_color, self.button_color)
+        self.msg_image = self.text.render(msg, self.text_color, self.button_color)
         self.msg_image_rect = self.msg_image.get_rect()
         self.msg_image_rect.center = self.rect.center
 
     def draw_button(self):
         """draw blank button and then draw message"""
         self.screen.fill(self.button_color, self.rect)
-        self.screen.blit(self.msg_image, self.msg_image_rect)
\ No newline at end of file
+        self.screen.blit(self.msg_image, self.msg_image_rect)
+        return self.rect.copy()
\ No newline at end of file
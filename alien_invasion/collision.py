@@ -0,0 +1,38 @@
+from collections import defaultdict
+
+class SpatialHash:
+    """
+    A uniform grid that buckets items by the cells their rects cover,
+    so a collision query only looks at items near the rect instead of all of them
+    """
+
+    def __init__(self, cell_size):
+        """Initialize an empty hash with square cells of the given size"""
+        self.cell_size = cell_size
+        self.cells = defaultdict(list)
+
+    def clear(self):
+        """Remove every item, the hash is rebuilt every tick"""
+        self.cells.clear()
+
+    def _cells_covered(self, rect):
+        """Yield the (column, row) of every cell the rect covers"""
+        size = self.cell_size
+        for col in range(rect.left // size, (rect.right - 1) // size + 1):
+            for row in range(rect.top // size, (rect.bottom - 1) // size + 1):
+                yield col, row
+
+    def insert(self, item, rect):
+        """Add an item to every cell its rect covers"""
+        for cell in self._cells_covered(rect):
+            self.cells[cell].append((item, rect))
+
+    def query(self, rect):
+        """Return the items whose rects overlap the rect, each one only once"""
+        found = {}
+        for cell in self._cells_covered(rect):
+            for item, item_rect in self.cells.get(cell, ()):
+                if item not in found and rect.colliderect(item_rect):
+                    found[item] = True
+        return list(found)
+
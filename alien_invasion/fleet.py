@@ -0,0 +1,319 @@
+import numpy as np
+import pygame
+
+from alien import Alien
+from collision import SpatialHash
+
+# the fleet layer is transparent wherever it has this color, alien.bmp never uses it
+LAYER_KEY = (255, 0, 255)
+
+class Fleet:
+    """
+    A class to manage the whole alien fleet,
+    the fleet is a rigid grid: every alien sits at its fixed grid position plus one shared offset,
+    and the alive flags live in a numpy array
+    """
+
+    def __init__(self, ai_game):
+        """Initialize an empty fleet"""
+        self.screen = ai_game.screen
+        self.settings = ai_game.settings
+
+        # every alien shares the same image
+        self.image = ai_game.assets.image('images/alien.bmp', scale=self.settings.alien_scale)
+        self.alien_width, self.alien_height = self.image.get_size()
+
+        # aliens sit on a grid with one alien of spacing between them
+        self.step_x = 2 * self.alien_width
+        self.step_y = 2 * self.alien_height
+        self.spatial_hash = SpatialHash(max(self.step_x, self.step_y))
+
+        # the live fleet pre-drawn on one surface, redrawn when a wave starts, killed aliens are erased from it
+        self.layer = None
+        self.layer_dirty = True
+
+        # the arrays are allocated once and reused by every new fleet, see _reserve()
+        self.capacity = 0
+        self.views = []   # Alien sprites handed out by sprites(), one per slot
+        self._reserve(self.settings.alien_pool_size)
+        self.empty()
+
+    def _reserve(self, count):
+        """Make sure the backing arrays can hold count aliens, they only ever grow"""
+        if count <= self.capacity:
+            return
+        self.capacity = count
+        self._base_x = np.zeros(count, dtype=int)
+        self._base_y = np.zeros(count, dtype=int)
+        self._alive = np.zeros(count, dtype=bool)
+        self._row = np.zeros(count, dtype=int)
+        self._col = np.zeros(count, dtype=int)
+
+    def _use(self, count):
+        """Point the fleet arrays at the first count slots of the backing arrays"""
+        self.base_x = self._base_x[:count]   # grid positions, before the fleet offset
+        self.base_y = self._base_y[:count]
+        self.alive = self._alive[:count]
+        self.row = self._row[:count]
+        self.col = self._col[:count]
+
+    def empty(self):
+        """Get rid of every alien in the fleet"""
+        self._use(0)
+        self.number_rows = 0
+        self.number_aliens_x = 0
+        self.set_alive(self.alive)
+        self._reset_offset()
+
+    def _reset_offset(self):
+        """Put the fleet back at its starting position"""
+        self.offset_x = 0.0   # exact offset of the whole fleet from its grid positions
+        self.offset_y = 0.0
+        self.prev_offset_x = 0.0   # offset at the previous tick, used to interpolate drawing
+        self.prev_offset_y = 0.0
+
+    def create(self, number_rows, number_aliens_x):
+        """Fill the fleet with rows of aliens, spacing between each alien is equal to one alien size"""
+        self.number_rows, self.number_aliens_x = number_rows, number_aliens_x
+        count = number_rows * number_aliens_x
+        self._reserve(count)
+        self._use(count)
+
+        # a new wave is written over the arrays of the last one
+        self.row[:], self.col[:] = divmod(np.arange(count), max(number_aliens_x, 1))
+        np.multiply(self.col, self.step_x, out=self.base_x)
+        self.base_x += self.alien_width
+        np.multiply(self.row, self.step_y, out=self.base_y)
+        self.base_y += self.alien_height
+        self._reset_offset()
+        self.set_alive(True)
+
+    def set_alive(self, alive):
+        """Replace the alive flags and recount the live aliens per row and column"""
+        self.alive[:] = alive
+        self.live = int(np.count_nonzero(self.alive))
+        self.layer_dirty = True
+        live_slots = np.flatnonzero(self.alive)
+        self.col_counts = np.bincount(self.col[live_slots], minlength=self.number_aliens_x)
+        self.row_counts = np.bincount(self.row[live_slots], minlength=self.number_rows)
+
+        # the live bounds of the fleet, kept up to date by kill() as aliens die
+        live_cols = np.flatnonzero(self.col_counts)
+        live_rows = np.flatnonzero(self.row_counts)
+        self.first_col = int(live_cols[0]) if live_cols.size else 0
+        self.last_col = int(live_cols[-1]) if live_cols.size else -1
+        self.first_row = int(live_rows[0]) if live_rows.size else 0
+        self.last_row = int(live_rows[-1]) if live_rows.size else -1
+
+    def kill(self, indices):
+        """Destroy the aliens in the given slots and move the live bounds in if an edge emptied"""
+        for index in indices:
+            if not self.alive[index]:
+                continue
+            self.alive[index] = False
+            self.live -= 1
+            self.col_counts[self.col[index]] -= 1
+            self.row_counts[self.row[index]] -= 1
+            if self.layer is not None and not self.layer_dirty:
+                # only the dead alien's cell is cleared, rebuilding the layer would redraw every alien
+                cell = (int(self.base_x[index]) - self.alien_width, int(self.base_y[index]) - self.alien_height,
+                        self.alien_width, self.alien_height)
+                self.layer.fill(LAYER_KEY, cell)
+
+        if not self.live:
+            self.first_col, self.last_col, self.first_row, self.last_row = 0, -1, 0, -1
+            return
+        while not self.col_counts[self.first_col]:
+            self.first_col += 1
+        while not self.col_counts[self.last_col]:
+            self.last_col -= 1
+        while not self.row_counts[self.first_row]:
+            self.first_row += 1
+        while not self.row_counts[self.last_row]:
+            self.last_row -= 1
+
+    def __len__(self):
+        """Number of aliens still alive"""
+        return self.live
+
+    @property
+    def left(self):
+        """Whole pixels every alien rect is moved right of its grid position, rounded like the rects round"""
+        return int(np.floor(self.offset_x))
+
+    @property
+    def top(self):
+        """Whole pixels every alien rect is moved down from its grid position"""
+        return int(np.floor(self.offset_y))
+
+    @property
+    def x(self):
+        """Exact horizontal positions of every slot"""
+        return self.base_x + self.offset_x
+
+    @property
+    def y(self):
+        """Exact vertical positions of every slot"""
+        return self.base_y + self.offset_y
+
+    def position(self, index):
+        """Return the top left corner of the alien in a slot"""
+        return int(self.base_x[index]) + self.left, int(self.base_y[index]) + self.top
+
+    def _rects(self):
+        """Return the left, top, right and bottom edges of every alien as the integer rects would have them"""
+        left = self.base_x + self.left
+        top = self.base_y + self.top
+        return left, top, left + self.alien_width, top + self.alien_height
+
+    def _bounds(self, dx, dy):
+        """Return the rect around the live aliens when the fleet is moved by dx, dy"""
+        left = self.alien_width + self.step_x * self.first_col + dx
+        top = self.alien_height + self.step_y * self.first_row + dy
+        right = self.alien_width + self.step_x * self.last_col + dx + self.alien_width
+        bottom = self.alien_height + self.step_y * self.last_row + dy + self.alien_height
+        return pygame.Rect(left, top, right - left, bottom - top)
+
+    def update(self):
+        """Move the whole fleet to right or left"""
+        self.prev_offset_x = self.offset_x
+        self.prev_offset_y = self.offset_y
+        self.offset_x += self.settings.alien_speed * self.settings.fleet_direction
+
+    def check_edges(self):
+        """Return True if the leftmost or rightmost live column is at the edge of the screen"""
+        if not self.live:
+            return False
+        bounds = self._bounds(self.left, self.top)
+        return bounds.right >= self.settings.screen_width or bounds.left <= 0
+
+    def drop(self):
+        """Drop the entire fleet"""
+        self.offset_y += self.settings.fleet_drop_speed
+
+    def reached_bottom(self):
+        """Return True if the lowest live row touches the bottom of the screen"""
+        if not self.live:
+            return False
+        return self._bounds(self.left, self.top).bottom >= self.settings.screen_height
+
+    def _grid_range(self, low, high, origin, step, size, count):
+        """Return the first and last grid index along one axis whose aliens overlap [low, high)"""
+        # the alien at origin + step * i overlaps when low < origin + step * i + size and high > origin + step * i
+        first = max(0, (low - origin - size) // step + 1)
+        last = min(count - 1, -((origin - high) // step) - 1)
+        return first, last
+
+    def _grid_candidates(self, rect):
+        """
+        Return the slots that overlap the rect,
+        the fleet is a rigid grid moving in lockstep so this is index arithmetic from the first slot
+        """
+        origin_x = self.alien_width + self.left
+        origin_y = self.alien_height + self.top
+        first_col, last_col = self._grid_range(rect.left, rect.right, origin_x, self.step_x,
+                                               self.alien_width, self.number_aliens_x)
+        first_row, last_row = self._grid_range(rect.top, rect.bottom, origin_y, self.step_y,
+                                               self.alien_height, self.number_rows)
+        if first_col > last_col or first_row > last_row:
+            return np.zeros(0, dtype=int)
+        rows = np.arange(first_row, last_row + 1)
+        cols = np.arange(first_col, last_col + 1)
+        return (rows[:, None] * self.number_aliens_x + cols).ravel()
+
+    def _build_spatial_hash(self):
+        """Rebuild the spatial hash from the live aliens"""
+        self.spatial_hash.clear()
+        left, top, _, _ = self._rects()
+        for index in np.flatnonzero(self.alive).tolist():
+            rect = pygame.Rect(left[index], top[index], self.alien_width, self.alien_height)
+            self.spatial_hash.insert(index, rect)
+
+    def _collide(self, rect):
+        """Return the indices of the live aliens overlapping the rect"""
+        if self.settings.collision_mode == 'hash':
+            return np.array(self.spatial_hash.query(rect), dtype=int)
+        candidates = self._grid_candidates(rect)
+        return candidates[self.alive[candidates]]
+
+    def collide_rect(self, rect):
+        """Return True if any live alien overlaps the rect"""
+        if not self.live:
+            return False
+        if self.settings.collision_mode == 'hash':
+            self._build_spatial_hash()
+        return bool(self._collide(rect).size)
+
+    def collide_bullets(self, bullets):
+        """
+        Remove bullets and aliens that have collided,
+        return a dict mapping each bullet to the indices of the aliens it hit like groupcollide does
+        """
+        collisions = {}
+        if not bullets or not self.live:
+            return collisions
+
+        if self.settings.collision_mode == 'hash':
+            self._build_spatial_hash()
+        for bullet in bullets.sprites():
+            # an alien can only be destroyed once, even when two bullets hit it in the same tick
+            hits = self._collide(bullet.rect)
+            hits = hits[self.alive[hits]].tolist()
+            if hits:
+                self.kill(hits)
+                bullets.remove(bullet)
+                collisions[bullet] = hits
+        return collisions
+
+    def sprites(self):
+        """Return a list of Alien sprites for the live aliens, for code that wants sprites"""
+        # the sprites are views of fleet slots, so they are created once per slot and reused
+        while len(self.views) < self.alive.size:
+            self.views.append(Alien(self, len(self.views)))
+        sprites = [self.views[index] for index in np.flatnonzero(self.alive).tolist()]
+        for alien in sprites:
+            alien.sync()
+        return sprites
+
+    def _build_layer(self):
+        """Draw every live alien at its grid position onto the fleet layer"""
+        width = self.step_x * (self.number_aliens_x - 1) + self.alien_width
+        height = self.step_y * (self.number_rows - 1) + self.alien_height
+        if self.layer is None or self.layer.get_size() != (width, height):
+            self.layer = pygame.Surface((width, height))
+            if pygame.display.get_surface() is not None:
+                self.layer = self.layer.convert()
+            # a plain colorkey, RLEACCEL blits faster but every change to the layer would encode it again
+            self.layer.set_colorkey(LAYER_KEY)
+
+        self.layer.fill(LAYER_KEY)
+        live = np.flatnonzero(self.alive)
+        positions = zip((self.base_x[live] - self.alien_width).tolist(),
+                        (self.base_y[live] - self.alien_height).tolist())
+        self.layer.blits([(self.image, pos) for pos in positions], doreturn=False)
+        self.layer_dirty = False
+
+    def draw(self, surface, alpha=1.0):
+        """
+        Draw every live alien, the fleet offset is interpolated between the last two ticks once,
+        the 'layer' draw mode blits the cached fleet layer once and 'sprites' blits every alien,
+        return the rect bounding everything drawn or None if the fleet is empty
+        """
+        if not self.live:
+            return None
+        dx = round(self.prev_offset_x + (self.offset_x - self.prev_offset_x) * alpha)
+        dy = round(self.prev_offset_y + (self.offset_y - self.prev_offset_y) * alpha)
+        bounds = self._bounds(dx, dy)
+
+        if self.settings.fleet_draw_mode == 'sprites':
+            live = np.flatnonzero(self.alive)
+            positions = zip((self.base_x[live] + dx).tolist(), (self.base_y[live] + dy).tolist())
+            surface.blits([(self.image, pos) for pos in positions], doreturn=False)
+            return bounds
+
+        if self.layer_dirty:
+            self._build_layer()
+        # the layer starts at the first grid position, only the part around the live aliens is blitted
+        area = bounds.move(-self.alien_width - dx, -self.alien_height - dy)
+        surface.blit(self.layer, bounds, area)
+        return bounds
@@ -0,0 +1,44 @@
+MENU = 'menu'
+PLAYING = 'playing'
+RESPAWN_PAUSE = 'respawn_pause'
+GAME_OVER = 'game_over'
+LEVEL_TRANSITION = 'level_transition'
+
+# the state each timed state moves on to when its time is up
+NEXT_STATE = {
+    RESPAWN_PAUSE: PLAYING,
+    LEVEL_TRANSITION: PLAYING,
+    GAME_OVER: MENU,
+}
+
+
+class GameState:
+    """
+    A class to track which state the game is in,
+    timed states count down in simulation ticks so the main loop keeps running while they last
+    """
+
+    def __init__(self, ai_game):
+        """Start in the menu"""
+        self.settings = ai_game.settings
+        self.state = MENU
+        self.ticks_left = 0
+
+    def enter(self, state, seconds=0.0):
+        """Switch to a state, timed states last the given number of seconds"""
+        self.state = state
+        self.ticks_left = 0 if self.settings.skip_pauses else round(seconds * self.settings.tick_rate)
+        if state in NEXT_STATE and not self.ticks_left:
+            self.state = NEXT_STATE[state]
+
+    def update(self):
+        """Count down a timed state by one tick and move on when its time is up"""
+        if self.state in NEXT_STATE:
+            self.ticks_left -= 1
+            if self.ticks_left <= 0:
+                self.enter(NEXT_STATE[self.state])
+
+    @property
+    def playing(self):
+        """True while the ship, bullets and aliens should move"""
+        return self.state == PLAYING
@@ -1,23 +1,55 @@
 import json
+import hashlib
+
+from score_store import ScoreStore
+from replay import settings_snapshot
 
 class GameStats():
     """Track statistics for Alien Invasion"""
 
     def __init__(self, ai_game):
         """Initialize the game statistics"""
+        self.ai_game = ai_game
         self.settings = ai_game.settings
         self.reset_stats()  # this method resets all the statistics for every new game
 
         # start the game in inactive state
         self.game_active = False
 
-        # High score should never be reset and is loaded from the json file where it is saved
-        high_score_file = 'high_score.json'
-        with open(high_score_file) as f:
-            self.high_score = json.load(f)
+        # High score should never be reset, the store loads it from disk the first time it is needed
+        # a headless game never touches the saved scores
+        score_file = None if ai_game.headless else self.settings.score_file
+        self.store = ScoreStore(score_file, self.settings.leaderboard_size)
+        self.store.preload()
+        self._high_score = None
+
+    @property
+    def high_score(self):
+        """The best score so far, including the current game"""
+        if self._high_score is None:
+            self._high_score = self.store.high_score
+        return self._high_score
+
+    @high_score.setter
+    def high_score(self, value):
+        self._high_score = value
 
     def reset_stats(self):
         """Initialize statistics that can change during a game"""
         self.ships_left = self.settings.ship_limit
         self.score = 0
-        self.level = 1
\ No newline at end of file
+        self.level = 1
+
+        # kept with the game on the leaderboard
+        self.start_tick = self.ai_game.ticks
+        settings_json = json.dumps(settings_snapshot(self.settings), sort_keys=True)
+        self.settings_hash = hashlib.sha1(settings_json.encode()).hexdigest()[:12]
+
+    def save_high_score(self):
+        """Hand the high score to the store, it is written in the background"""
+        self.store.save_high_score(self.high_score)
+
+    def record_game(self):
+        """Put the finished game on the leaderboard"""
+        duration = (self.ai_game.ticks - self.start_tick) / self.settings.tick_rate
+        self.store.record_game(self.score, self.level, duration, self.settings_hash)
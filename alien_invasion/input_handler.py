@@ -0,0 +1,109 @@
+from collections import deque
+from time import perf_counter
+
+import pygame
+
+class InputHandler:
+    """
+    A class to turn keyboard and gamepad events into game actions,
+    events are timestamped when they are polled so each one is applied at the tick it happened in,
+    and the time from an event to the first frame showing it is kept as input latency
+    """
+
+    def __init__(self, ai_game):
+        """Initialize the bindings and an empty queue of events"""
+        self.settings = ai_game.settings
+        self.load_bindings()
+
+        # gamepads are opened as they are plugged in, see JOYDEVICEADDED
+        # the joystick subsystem is only started when some gamepad button is bound
+        if self.settings.gamepad_buttons:
+            pygame.joystick.init()
+        self.gamepads = {}
+        self.stick = 0   # which way the stick or hat is pushed, -1 left, 0 centered, 1 right
+
+        self.queue = deque()   # (timestamp, event) waiting for the tick they belong to
+        self.last_tick_end = perf_counter()
+        self.shown = []   # timestamps of applied events not yet on screen
+        self.latencies = deque(maxlen=self.settings.latency_samples)
+
+    def load_bindings(self):
+        """Look up the key codes of the key bindings"""
+        self.keys = {pygame.key.key_code(name): action for name, action in self.settings.key_bindings.items()}
+
+    def poll(self):
+        """Take every waiting event from pygame and stamp it with the time it was seen"""
+        now = perf_counter()
+        for event in pygame.event.get():
+            self.queue.append((now, event))
+
+    def tick_ends(self, ticks):
+        """
+        Return the time each of the next ticks stands for,
+        the ticks of a frame are spread evenly over the real time since the last frame that ran ticks
+        """
+        if not ticks:
+            return []
+        now = perf_counter()
+        span = (now - self.last_tick_end) / ticks
+        ends = [self.last_tick_end + span * k for k in range(1, ticks)] + [now]
+        self.last_tick_end = now
+        return ends
+
+    def due(self, tick_end):
+        """Return the queued events that happened before tick_end, in the order they happened"""
+        events = []
+        while self.queue and self.queue[0][0] <= tick_end:
+            timestamp, event = self.queue.popleft()
+            if event.type in (pygame.KEYDOWN, pygame.KEYUP, pygame.JOYBUTTONDOWN,
+                              pygame.JOYAXISMOTION, pygame.JOYHATMOTION):
+                self.shown.append(timestamp)
+            events.append(event)
+        return events
+
+    def actions(self, event):
+        """Return the (action, pressed) pairs an event maps to"""
+        if event.type in (pygame.KEYDOWN, pygame.KEYUP):
+            action = self.keys.get(event.key)
+            return [(action, event.type == pygame.KEYDOWN)] if action else []
+        if event.type in (pygame.JOYBUTTONDOWN, pygame.JOYBUTTONUP):
+            action = self.settings.gamepad_buttons.get(event.button)
+            return [(action, event.type == pygame.JOYBUTTONDOWN)] if action else []
+        if event.type == pygame.JOYHATMOTION:
+            return self._steer(event.value[0])
+        if event.type == pygame.JOYAXISMOTION and event.axis == 0:
+            deadzone = self.settings.gamepad_deadzone
+            return self._steer(-1 if event.value < -deadzone else 1 if event.value > deadzone else 0)
+        if event.type == pygame.JOYDEVICEADDED:
+            gamepad = pygame.joystick.Joystick(event.device_index)
+            self.gamepads[gamepad.get_instance_id()] = gamepad
+        elif event.type == pygame.JOYDEVICEREMOVED:
+            self.gamepads.pop(event.instance_id, None)
+            return self._steer(0)
+        return []
+
+    def _steer(self, direction):
+        """Return the presses and releases that turn the current stick direction into the new one"""
+        if direction == self.stick:
+            return []
+        self.stick = direction
+        return [('left', direction < 0), ('right', direction > 0)]
+
+    def frame_shown(self):
+        """Note that a frame reached the display, every event applied before it is now visible"""
+        now = perf_counter()
+        self.latencies.extend(now - timestamp for timestamp in self.shown)
+        self.shown.clear()
+
+    def summary(self):
+        """Return the p50, p95 and p99 of the input latency in milliseconds, or None without samples"""
+        if not self.latencies:
+            return None
+        values = sorted(self.latencies)
+        return {f'p{p}': values[min(len(values) - 1, len(values) * p // 100)] * 1000 for p in (50, 95, 99)}
+
+    def report(self):
+        """Print the input latency percentiles"""
+        summary = self.summary()
+        if summary:
+            print(f"{'input latency':32}" + '  '.join(f"{p} {value:7.3f}ms" for p, value in summary.items()))
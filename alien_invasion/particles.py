@@ -0,0 +1,152 @@
+import math
+from time import perf_counter
+
+import numpy as np
+import pygame
+
+# new particles glow in the last color and fade toward the first as they burn out
+COLORS = ((200, 60, 30), (230, 110, 40), (250, 170, 60), (255, 220, 100), (255, 245, 170))
+
+
+class ParticleSystem:
+    """
+    A class to manage explosion particles in arrays, updated and drawn in batches,
+    no more than Settings.particle_limit particles live at once and when drawing and updating them
+    goes over Settings.particle_frame_budget fewer particles are made until it fits again
+    """
+
+    def __init__(self, ai_game):
+        """Allocate the particle arrays once, they are reused for every explosion"""
+        self.settings = ai_game.settings
+        # nobody sees a headless game, so it makes no particles
+        self.limit = 0 if ai_game.headless else self.settings.particle_limit
+        self.x = np.zeros(self.limit)
+        self.y = np.zeros(self.limit)
+        self.vx = np.zeros(self.limit)
+        self.vy = np.zeros(self.limit)
+        self.life = np.zeros(self.limit, dtype=int)   # ticks left to live
+        self.count = 0   # particles in use, always the first count slots
+
+        # 1.0 is full detail, it drops when a frame goes over budget and creeps back up when there is room
+        self.quality = 1.0
+        self.spent = 0.0   # time spent on particles since the last frame was drawn
+
+        self.rng = np.random.default_rng()   # particles are only for show, so they don't share the game's randomness
+        self.palette = None
+        self.palette_surface = None
+
+    @property
+    def max_life(self):
+        """Longest a particle lives in ticks, read from the settings every time so a reload takes effect"""
+        return max(1, round(self.settings.particle_life * self.settings.tick_rate))
+
+    def __len__(self):
+        """Number of live particles"""
+        return self.count
+
+    def empty(self):
+        """Get rid of every particle"""
+        self.count = 0
+
+    def explode(self, x, y):
+        """Throw out a burst of particles from x, y, as many as the quality and the cap allow"""
+        cap = int(self.limit * self.quality)
+        new = min(round(self.settings.particles_per_explosion * self.quality), cap - self.count)
+        if new <= 0:
+            return
+        start = perf_counter()
+        burst = slice(self.count, self.count + new)
+        angle = self.rng.uniform(0.0, 2 * math.pi, new)
+        speed = self.rng.uniform(0.2, 1.0, new) * self.settings.particle_speed
+        self.x[burst] = x
+        self.y[burst] = y
+        self.vx[burst] = np.cos(angle) * speed
+        self.vy[burst] = np.sin(angle) * speed
+        max_life = self.max_life
+        self.life[burst] = self.rng.integers(max_life // 2, max_life + 1, new)
+        self.count += new
+        self.spent += perf_counter() - start
+
+    def update(self):
+        """Move every particle one tick, particles that burned out are dropped"""
+        if not self.count:
+            return
+        start = perf_counter()
+        count = self.count
+        self.x[:count] += self.vx[:count]
+        self.y[:count] += self.vy[:count]
+        self.life[:count] -= 1
+
+        # the live particles are moved to the front so the arrays stay packed
+        live = np.flatnonzero(self.life[:count] > 0)
+        if live.size < count:
+            self._keep(live)
+        self.spent += perf_counter() - start
+
+    def _keep(self, indices):
+        """Keep only the particles at indices, packed at the front of the arrays"""
+        kept = len(indices)
+        for values in (self.x, self.y, self.vx, self.vy, self.life):
+            values[:kept] = values[indices]
+        self.count = kept
+
+    def _palette(self, surface):
+        """Return the fade colors as pixel values in the surface's format"""
+        if self.palette_surface is not surface:
+            self.palette = np.array([surface.map_rgb(color) for color in COLORS], dtype=np.uint32)
+            self.palette_surface = surface
+        return self.palette
+
+    def draw(self, surface, alpha=1.0):
+        """
+        Draw every particle in one pass straight into the surface's pixels,
+        positions are interpolated between the last two ticks,
+        return the rect bounding everything drawn or None if nothing was
+        """
+        if not self.count:
+            return None
+        start = perf_counter()
+        count = self.count
+        size = self.settings.particle_size
+        back = 1.0 - alpha
+        xs = (self.x[:count] - self.vx[:count] * back).astype(int)
+        ys = (self.y[:count] - self.vy[:count] * back).astype(int)
+        width, height = surface.get_size()
+        shown = (xs >= 0) & (xs <= width - size) & (ys >= 0) & (ys <= height - size)
+        xs, ys = xs[shown], ys[shown]
+
+        rect = None
+        if xs.size:
+            # particles made before particle_life was shortened can outlive max_life, they stay at the last color
+            shades = np.minimum(self.life[:count][shown] * (len(COLORS) - 1) // self.max_life, len(COLORS) - 1)
+            colors = self._palette(surface)[shades]
+            try:
+                pixels = pygame.surfarray.pixels2d(surface)
+            except ValueError:
+                pixels = None   # 24 bit surfaces have no 2d pixel view, fill them one particle at a time
+            if pixels is not None:
+                for dx in range(size):
+                    for dy in range(size):
+                        pixels[xs + dx, ys + dy] = colors
+                del pixels   # unlocks the surface
+            else:
+                for x, y, color in zip(xs.tolist(), ys.tolist(), colors.tolist()):
+                    surface.fill(surface.unmap_rgb(color), (x, y, size, size))
+            left, top = int(xs.min()), int(ys.min())
+            rect = pygame.Rect(left, top, int(xs.max()) - left + size, int(ys.max()) - top + size)
+
+        self.spent += perf_counter() - start
+        self._adjust()
+        return rect
+
+    def _adjust(self):
+        """Trade detail for time after a frame, called once per drawn frame"""
+        if self.spent > self.settings.particle_frame_budget:
+            self.quality = max(0.1, self.quality * 0.8)
+            # over budget with what is already flying, so the oldest particles go first
+            cap = int(self.limit * self.quality)
+            if self.count > cap:
+                self._keep(np.arange(self.count - cap, self.count))
+        elif self.spent < self.settings.particle_frame_budget / 2:
+            self.quality = min(1.0, self.quality + 0.02)
+        self.spent = 0.0
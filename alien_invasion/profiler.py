@@ -0,0 +1,170 @@
+import sys
+import csv
+import json
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from time import perf_counter
+
+class StartupTimer:
+    """A class to time each step of building the game, from the constructor to the first playable frame"""
+
+    def __init__(self):
+        """Start timing"""
+        self.start = perf_counter()
+        self.last = self.start
+        self.steps = {}
+
+    def mark(self, name):
+        """End the step that has been running since the last mark"""
+        now = perf_counter()
+        self.steps[name] = now - self.last
+        self.last = now
+
+    def total(self):
+        """Return the time from the start to the last mark in seconds"""
+        return self.last - self.start
+
+    def report(self):
+        """Print how long each step took"""
+        for name, duration in self.steps.items():
+            print(f"startup {name:24}{duration * 1000:9.3f}ms")
+        print(f"startup {'total':24}{self.total() * 1000:9.3f}ms")
+
+
+class FrameProfiler:
+    """
+    A class to time each part of the game loop on every frame,
+    it does nothing unless Settings.profile is on
+    """
+
+    # sections in the order they run within a frame
+    SECTIONS = ('_check_events', 'ship.update', '_update_bullets', '_check_bullet_alien_collision',
+                '_update_aliens', '_update_screen')
+
+    def __init__(self, ai_game):
+        """Initialize an empty history of frames"""
+        self.ai_game = ai_game
+        self.settings = ai_game.settings
+        self.enabled = self.settings.profile
+
+        self.frames = deque(maxlen=self.settings.profile_max_frames)
+        self.start = perf_counter()
+        self._new_frame()
+
+    def _new_frame(self):
+        """Start collecting a new frame"""
+        self.frame_start = perf_counter()
+        self.times = dict.fromkeys(self.SECTIONS, 0.0)
+        self.events = []   # (section, start, duration) for the chrome trace
+        self.blocks = sys.getallocatedblocks()
+
+    def section(self, name):
+        """Return a context manager that adds the time spent in it to the named section"""
+        if not self.enabled:
+            return nullcontext()
+        return self._timed(name)
+
+    @contextmanager
+    def _timed(self, name):
+        """Time the body of a with block"""
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            duration = perf_counter() - start
+            self.times[name] += duration
+            self.events.append((name, start, duration))
+
+    def end_frame(self):
+        """Store the frame that just finished with its entity counts and allocations"""
+        if not self.enabled:
+            return
+        game = self.ai_game
+        self.frames.append({
+            'start': self.frame_start - self.start,
+            'frame': perf_counter() - self.frame_start,
+            'times': self.times,
+            'events': self.events,
+            'bullets': len(game.bullets),
+            'aliens': len(game.aliens),
+            'allocations': sys.getallocatedblocks() - self.blocks,
+        })
+        self._new_frame()
+
+    def draw_overlay(self, screen, text):
+        """Draw the last frame's timings at the bottom left of the screen, return the rect drawn to"""
+        if not self.enabled or not self.settings.profile_overlay or not self.frames:
+            return None
+        frame = self.frames[-1]
+        lines = [f"frame {frame['frame'] * 1000:.2f}ms  bullets {frame['bullets']}  "
+                 f"aliens {frame['aliens']}  allocs {frame['allocations']}"]
+        lines += [f"{name} {duration * 1000:.2f}ms" for name, duration in frame['times'].items()]
+        latency = self.ai_game.input.summary()
+        if latency:
+            lines.append('input latency ' + '  '.join(f"{p} {value:.2f}ms" for p, value in latency.items()))
+
+        font = text.font(24)
+        images = [font.render(line, True, (30, 30, 30), self.settings.bg_color) for line in lines]
+        y = screen.get_height() - sum(image.get_height() for image in images) - 10
+        rects = []
+        for image in images:
+            rects.append(screen.blit(image, (10, y)))
+            y += image.get_height()
+        return rects[0].unionall(rects)
+
+    def summary(self):
+        """Return the p50, p95 and p99 of the frame time and of every section in milliseconds"""
+        columns = {'frame': [frame['frame'] for frame in self.frames]}
+        for name in self.SECTIONS:
+            columns[name] = [frame['times'][name] for frame in self.frames]
+
+        summary = {}
+        for name, values in columns.items():
+            values = sorted(values)
+            if values:
+                summary[name] = {f'p{p}': values[min(len(values) - 1, len(values) * p // 100)] * 1000
+                                 for p in (50, 95, 99)}
+        return summary
+
+    def export(self, path):
+        """
+        Write the frames to path, a .csv gets one row per frame,
+        a .trace.json is a chrome trace-event file and any other .json the plain frame data
+        """
+        if path.endswith('.csv'):
+            with open(path, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(['start', 'frame', *self.SECTIONS, 'bullets', 'aliens', 'allocations'])
+                for frame in self.frames:
+                    writer.writerow([frame['start'], frame['frame'], *frame['times'].values(),
+                                     frame['bullets'], frame['aliens'], frame['allocations']])
+        elif path.endswith('.trace.json'):
+            # open in chrome://tracing or Perfetto, timestamps are in microseconds
+            events = [{'name': name, 'ph': 'X', 'pid': 0, 'tid': 0,
+                       'ts': (start - self.start) * 1e6, 'dur': duration * 1e6}
+                      for frame in self.frames for name, start, duration in frame['events']]
+            events += [{'name': 'entities', 'ph': 'C', 'pid': 0, 'ts': frame['start'] * 1e6,
+                        'args': {'bullets': frame['bullets'], 'aliens': frame['aliens']}}
+                       for frame in self.frames]
+            with open(path, 'w') as f:
+                json.dump({'traceEvents': events}, f)
+        else:
+            with open(path, 'w') as f:
+                json.dump([{key: value for key, value in frame.items() if key != 'events'}
+                           for frame in self.frames], f)
+
+    def finish(self):
+        """
+        Print the startup steps, input latency and frame percentiles,
+        export the frames if Settings.profile_export_path is set
+        """
+        if not self.enabled:
+            return
+        self.ai_game.startup.report()
+        self.ai_game.input.report()
+        if not self.frames:
+            return
+        for name, percentiles in self.summary().items():
+            print(f"{name:32}" + '  '.join(f"{p} {value:7.3f}ms" for p, value in percentiles.items()))
+        if self.settings.profile_export_path:
+            self.export(self.settings.profile_export_path)
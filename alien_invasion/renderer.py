@@ -0,0 +1,64 @@
+import pygame
+
+class DirtyRenderer:
+    """
+    A class to redraw only the regions of the screen that changed since the last frame
+    and push just those rects to the display instead of flipping the whole screen
+    """
+
+    def __init__(self, ai_game):
+        """Initialize the renderer, the first frame is always a full redraw"""
+        self.ai_game = ai_game
+        self.screen = ai_game.screen
+        self.settings = ai_game.settings
+
+        self.full_redraw = True
+        self.moving_rects = []   # where the ship, bullets and aliens were drawn on the last frame
+        self.static_rects = []   # where the scoreboard and button were drawn on the last frame
+        self.button_shown = None
+        self.particles_shown = False   # whether the last frame drew explosions that still need erasing
+
+    def invalidate(self):
+        """Ask for the next frame to redraw the whole screen"""
+        self.full_redraw = True
+
+    def render(self, alpha):
+        """Draw the frame, return True if anything was pushed to the display"""
+        game = self.ai_game
+        button_shown = not game.stats.game_active
+
+        if self.full_redraw:
+            self.screen.fill(self.settings.bg_color)
+            self.moving_rects = game.draw_moving(alpha)
+            self.static_rects = game.draw_static()
+            pygame.display.flip()
+            self.full_redraw = False
+            self.button_shown = button_shown
+            self.particles_shown = bool(game.particles)
+            game.sb.dirty = False
+            return True
+
+        # on the idle Play screen only the last explosions move, once they are gone there is nothing to draw
+        # until something changes
+        static_changed = game.sb.dirty or button_shown != self.button_shown
+        if not game.stats.game_active and not static_changed and not game.particles and not self.particles_shown:
+            return False
+        self.particles_shown = bool(game.particles)
+
+        # erase everything that moved, and the old scoreboard if it is about to change size
+        erased = self.moving_rects + (self.static_rects if static_changed else [])
+        for rect in erased:
+            self.screen.fill(self.settings.bg_color, rect)
+        self.moving_rects = game.draw_moving(alpha)
+        dirty = erased + self.moving_rects
+
+        # the scoreboard and button sit on top, so redraw them when something moved under them
+        static_rects = game.sb.rects() + ([game.play_button.rect] if button_shown else [])
+        if static_changed or any(rect.collidelist(dirty) != -1 for rect in static_rects):
+            self.static_rects = game.draw_static()
+            dirty += self.static_rects
+            self.button_shown = button_shown
+            game.sb.dirty = False
+
+        pygame.display.update(dirty)
+        return True
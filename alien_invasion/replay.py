@@ -0,0 +1,230 @@
+import sys
+import json
+import struct
+from time import perf_counter
+
+from settings import Settings
+
+# recording file layout: magic, version, settings snapshot, then runs of identical per-tick input flags
+MAGIC = b'AIRC'
+VERSION = 2   # version 1 had no fire count, its FIRE flag stands for one shot
+HEADER = struct.Struct('<4sBI')   # magic, version, length of the settings json
+COUNTS = struct.Struct('<II')   # number of ticks, number of runs
+RUN = struct.Struct('<BH')   # input flags, number of ticks they were held for
+MAX_RUN = 0xFFFF
+
+# per-tick input flags
+LEFT = 1
+RIGHT = 2
+FIRE = 4
+PLAY = 8
+# the high four bits count the bullets fired in the tick, FIRE is set whenever the count is
+FIRE_SHIFT = 4
+MAX_FIRES = 15
+
+# settings that change while playing, they are part of every state snapshot
+DYNAMIC_SETTINGS = ('ship_speed', 'bullet_speed', 'alien_speed', 'fleet_direction', 'alien_points')
+
+
+def settings_snapshot(settings):
+    """Return the settings as a dict of plain values that can be stored as json"""
+    return {name: value for name, value in vars(settings).items()
+            if isinstance(value, (int, float, str, bool, tuple, type(None)))}
+
+
+def settings_from_snapshot(snapshot):
+    """Build a Settings object from a settings snapshot"""
+    settings = Settings()
+    for name, value in snapshot.items():
+        # json turns the color tuples into lists
+        setattr(settings, name, tuple(value) if isinstance(value, list) else value)
+    return settings
+
+
+class InputRecorder:
+    """A class to log the player's input on every tick together with the settings it was played with"""
+
+    def __init__(self, ai_game):
+        """Start recording from the current tick"""
+        self.ai_game = ai_game
+        self.settings = settings_snapshot(ai_game.settings)
+        self.flags = bytearray()
+        self.pending = 0   # fire and play presses waiting for the next tick
+        self.fires = 0   # bullets fired since the last tick
+
+    def note_fire(self):
+        """Log a bullet fired while playing, it belongs to the next tick"""
+        self.pending |= FIRE
+        self.fires = min(self.fires + 1, MAX_FIRES)
+
+    def note_play(self):
+        """Log a click on the Play button that started a game"""
+        self.pending |= PLAY
+
+    def record_tick(self):
+        """Log the input in effect for the tick that is about to run"""
+        ship = self.ai_game.ship
+        flags = self.pending | self.fires << FIRE_SHIFT
+        if ship.moving_left:
+            flags |= LEFT
+        if ship.moving_right:
+            flags |= RIGHT
+        self.flags.append(flags)
+        self.pending = 0
+        self.fires = 0
+
+    def save(self, path):
+        """Write the recording to a file, consecutive ticks with the same input are stored once"""
+        runs = []
+        for flags in self.flags:
+            if runs and runs[-1][0] == flags and runs[-1][1] < MAX_RUN:
+                runs[-1][1] += 1
+            else:
+                runs.append([flags, 1])
+
+        settings_json = json.dumps(self.settings).encode()
+        with open(path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, len(settings_json)))
+            f.write(settings_json)
+            f.write(COUNTS.pack(len(self.flags), len(runs)))
+            for flags, length in runs:
+                f.write(RUN.pack(flags, length))
+
+
+def load_recording(path):
+    """Read a recording, return its settings snapshot and the input flags of every tick"""
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    magic, version, settings_length = HEADER.unpack_from(data)
+    if magic != MAGIC or version not in (1, VERSION):
+        raise ValueError(f"{path} is not an Alien Invasion recording")
+    offset = HEADER.size
+    settings = json.loads(data[offset:offset + settings_length])
+    offset += settings_length
+
+    tick_count, run_count = COUNTS.unpack_from(data, offset)
+    offset += COUNTS.size
+    flags = bytearray()
+    for value, length in RUN.iter_unpack(data[offset:offset + run_count * RUN.size]):
+        flags.extend(bytes([value]) * length)
+    if len(flags) != tick_count:
+        raise ValueError(f"{path} is truncated")
+    return settings, flags
+
+
+def snapshot(ai_game):
+    """Return a copy of everything the simulation needs to continue from the current tick"""
+    fleet = ai_game.aliens
+    ship = ai_game.ship
+    stats = ai_game.stats
+    return {
+        'ticks': ai_game.ticks,
+        'state': (ai_game.state.state, ai_game.state.ticks_left),
+        'ship': (ship.x, ship.prev_x, ship.moving_left, ship.moving_right),
+        'bullets': [(bullet.rect.x, bullet.y, bullet.prev_y) for bullet in ai_game.bullets],
+        'fleet': (fleet.number_rows, fleet.number_aliens_x, fleet.offset_x, fleet.offset_y,
+                  fleet.prev_offset_x, fleet.prev_offset_y, fleet.alive.copy()),
+        'settings': {name: getattr(ai_game.settings, name) for name in DYNAMIC_SETTINGS},
+        'stats': (stats.score, stats.level, stats.ships_left, stats.game_active, stats.high_score),
+    }
+
+
+def restore(ai_game, state):
+    """Put the game back into the state of a snapshot"""
+    ai_game.ticks = state['ticks']
+    ai_game.state.state, ai_game.state.ticks_left = state['state']
+
+    ship = ai_game.ship
+    ship.x, ship.prev_x, ship.moving_left, ship.moving_right = state['ship']
+    ship.rect.x = ship.x
+
+    ai_game.bullets.empty()
+    for x, y, prev_y in state['bullets']:
+        bullet = ai_game.bullets.fire(ship.rect)
+        bullet.rect.x = x
+        bullet.y, bullet.prev_y = y, prev_y
+        bullet.rect.y = y
+
+    fleet = ai_game.aliens
+    number_rows, number_aliens_x, offset_x, offset_y, prev_offset_x, prev_offset_y, alive = state['fleet']
+    fleet.create(number_rows, number_aliens_x)
+    fleet.offset_x, fleet.offset_y = offset_x, offset_y
+    fleet.prev_offset_x, fleet.prev_offset_y = prev_offset_x, prev_offset_y
+    fleet.set_alive(alive)
+
+    for name, value in state['settings'].items():
+        setattr(ai_game.settings, name, value)
+
+    stats = ai_game.stats
+    stats.score, stats.level, stats.ships_left, stats.game_active, stats.high_score = state['stats']
+    ai_game.sb.prep_score()
+    ai_game.sb.prep_high_score()
+    ai_game.sb.prep_level()
+    ai_game.sb.prep_ships()
+
+
+class Replayer:
+    """
+    A class to re-run a recording headlessly as fast as possible,
+    state snapshots are kept every Settings.replay_snapshot_interval ticks so seeking doesn't start over
+    """
+
+    def __init__(self, path):
+        """Load the recording and build a headless game with the recorded settings"""
+        # imported here because alien_invasion imports this module for recording
+        from alien_invasion import AlienInvasion
+
+        settings, self.flags = load_recording(path)
+        settings = settings_from_snapshot(settings)
+        settings.record_path = None   # don't record the replay itself
+        self.ai_game = AlienInvasion(headless=True, settings=settings)
+        self.interval = self.ai_game.settings.replay_snapshot_interval
+        self.snapshots = {0: snapshot(self.ai_game)}
+        self.tick = 0
+
+    def _apply(self, flags):
+        """Feed one tick of recorded input to the game, then run the tick"""
+        game = self.ai_game
+        if flags & PLAY:
+            game._start_game()
+        game.ship.moving_left = bool(flags & LEFT)
+        game.ship.moving_right = bool(flags & RIGHT)
+        if flags & FIRE:
+            for _ in range(max(flags >> FIRE_SHIFT, 1)):
+                game._fire_bullet()
+        game._update_world()
+        self.tick += 1
+        if self.tick % self.interval == 0 and self.tick not in self.snapshots:
+            self.snapshots[self.tick] = snapshot(game)
+
+    def seek(self, tick):
+        """Move to the given tick, starting from the nearest snapshot at or before it"""
+        tick = min(tick, len(self.flags))
+        start = max(t for t in self.snapshots if t <= tick)
+        if tick < self.tick or start > self.tick:
+            restore(self.ai_game, self.snapshots[start])
+            self.tick = start
+        while self.tick < tick:
+            self._apply(self.flags[self.tick])
+
+    def run(self, until=None):
+        """Replay up to the given tick (the end by default), return the time each tick took in seconds"""
+        until = len(self.flags) if until is None else min(until, len(self.flags))
+        tick_times = []
+        while self.tick < until:
+            start = perf_counter()
+            self._apply(self.flags[self.tick])
+            tick_times.append(perf_counter() - start)
+        return tick_times
+
+
+if __name__ == '__main__':
+    # replay a recording at full speed and report how long the ticks took
+    replayer = Replayer(sys.argv[1])
+    tick_times = sorted(replayer.run())
+    stats = replayer.ai_game.stats
+    if tick_times:
+        print(f"{len(tick_times)} ticks in {sum(tick_times):.3f}s, "
+              f"mean {sum(tick_times) / len(tick_times) * 1e6:.1f}us, max {tick_times[-1] * 1e6:.1f}us")
+    print(f"score {stats.score}, level {stats.level}, ships left {stats.ships_left}")
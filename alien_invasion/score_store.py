@@ -0,0 +1,143 @@
+import os
+import json
+import queue
+import shutil
+import tempfile
+import threading
+
+
+def _is_score(value):
+    """Return True if a value read from the file can be used as a score"""
+    return type(value) in (int, float)
+
+
+class ScoreStore:
+    """
+    A class to keep the high score and a leaderboard of the best games on disk,
+    the file is read on first use and written atomically from a background thread
+    """
+
+    def __init__(self, path, leaderboard_size):
+        """Initialize the store, a path of None keeps everything in memory"""
+        self.path = path
+        self.leaderboard_size = leaderboard_size
+        self._data = None
+        self.lock = threading.Lock()
+        self.loader = None   # reads the file in the background, see preload()
+
+        # saves are handed to a writer thread so they never block a frame
+        self.pending = queue.Queue()
+        self.writer = None
+
+    def preload(self):
+        """Start reading the file on a background thread, so the first use doesn't wait on the disk"""
+        if self._data is None and self.path and self.loader is None:
+            self.loader = threading.Thread(target=self._load, name='score-loader', daemon=True)
+            self.loader.start()
+
+    def _load(self):
+        """Return the stored data, reading the file the first time"""
+        if self.loader is not None and self.loader is not threading.current_thread():
+            self.loader.join()
+        if self._data is None:
+            data = {'high_score': 0, 'leaderboard': []}
+            if self.path:
+                try:
+                    with open(self.path) as f:
+                        stored = json.load(f)
+                except (OSError, ValueError):
+                    stored = None   # a missing or broken file starts from scratch
+
+                # older versions saved the bare high score
+                if isinstance(stored, dict):
+                    self._take_valid(data, stored)
+                elif _is_score(stored):
+                    data['high_score'] = stored
+            self._data = data
+        return self._data
+
+    def _take_valid(self, data, stored):
+        """Copy the parts of the stored dict that check out into data, anything else keeps its default"""
+        if _is_score(stored.get('high_score')):
+            data['high_score'] = stored['high_score']
+        if isinstance(stored.get('leaderboard'), list):
+            data['leaderboard'] = [game for game in stored['leaderboard']
+                                   if isinstance(game, dict) and _is_score(game.get('score'))]
+
+    @property
+    def high_score(self):
+        """The best score ever saved"""
+        return self._load()['high_score']
+
+    @property
+    def leaderboard(self):
+        """The best games, highest score first"""
+        return list(self._load()['leaderboard'])
+
+    def save_high_score(self, high_score):
+        """Store a new high score"""
+        with self.lock:
+            data = self._load()
+            data['high_score'] = max(data['high_score'], high_score)
+        self._save()
+
+    def record_game(self, score, level, duration, settings_hash):
+        """Add a finished game to the leaderboard if it is good enough, and store the high score"""
+        with self.lock:
+            data = self._load()
+            data['high_score'] = max(data['high_score'], score)
+            data['leaderboard'].append({'score': score, 'level': level, 'duration': round(duration, 2),
+                                        'settings_hash': settings_hash})
+            data['leaderboard'].sort(key=lambda game: game['score'], reverse=True)
+            del data['leaderboard'][self.leaderboard_size:]
+        self._save()
+
+    def _save(self):
+        """Hand a copy of the data to the writer thread"""
+        if not self.path:
+            return
+        with self.lock:
+            self.pending.put(json.dumps(self._data))
+        # a writer that died on an unexpected error is replaced, so flush() never waits on a dead thread
+        if self.writer is None or not self.writer.is_alive():
+            self.writer = threading.Thread(target=self._write_loop, name='score-writer', daemon=True)
+            self.writer.start()
+
+    def _write_loop(self):
+        """Write queued saves to disk, only the newest of several waiting saves is written"""
+        while True:
+            contents = self.pending.get()
+            skipped = 0
+            while not self.pending.empty():
+                contents = self.pending.get()
+                skipped += 1
+            # a failed save is reported and the thread keeps going, the next save may well work
+            try:
+                self._write(contents)
+            except OSError as error:
+                print(f"can't save {self.path}: {error}")
+            finally:
+                for _ in range(skipped + 1):
+                    self.pending.task_done()
+
+    def _write(self, contents):
+        """Write to a temporary file next to the real one, then rename it over the real one"""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.high_score', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write(contents)
+                f.flush()
+                os.fsync(f.fileno())
+            # mkstemp makes the file readable by its owner only, keep the permissions the score file had
+            if os.path.exists(self.path):
+                shutil.copymode(self.path, temp_path)
+            os.replace(temp_path, self.path)
+        except OSError:
+            os.remove(temp_path)
+            raise
+
+    def flush(self):
+        """Wait until every queued save is on disk"""
+        if self.writer is not None:
+            self.pending.join()
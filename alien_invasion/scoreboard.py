@@ -1,8 +1,5 @@
 
 import pygame.font
-from pygame.sprite import Group
-
-from ship import Ship
 
 class Scoreboard:
     """A class to report scoring information"""
@@ -15,9 +12,15 @@ class Scoreboard:
         self.settings = ai_game.settings
         self.stats = ai_game.stats
 
-        # Font settings for scoring information
+        # Font settings for scoring information, text is rendered through the shared text renderer
         self.text_color = (30, 30, 30)
-        self.font = pygame.font.SysFont(None, 48)
+        self.text = ai_game.text
+
+        # the remaining ships are drawn with the shared ship image
+        self.ship_image = ai_game.assets.image('images/ship.bmp')
+
+        # set whenever an image changes, so the renderer knows to redraw the scoreboard
+        self.dirty = True
 
         # prepare the initial score images, level, and ship images
         self.prep_score()
@@ -29,8 +32,10 @@ class Scoreboard:
         """Turn the score into a rendered image"""
         rounded_score = round(self.stats.score, -1)
         score_str = "{:,}".format(rounded_score)
-        self.score_image = self.font.render('Current Score: ' + score_str, True,
-                                            self.text_color, self.settings.bg_color)
+        self.score_image = self.text.render_number('Current Score: ', score_str,
+                                                   self.text_color, self.settings.bg_color)
+
+        self.dirty = True
 
         # Display the score at the top right of the screen
         self.score_rect = self.score_image.get_rect()
@@ -41,8 +46,10 @@ class Scoreboard:
         """Turn the high score into a rendered image"""
         high_score = round(self.stats.high_score, -1)
         high_score_str = "{:,}".format(high_score)
-        self.high_score_image = self.font.render('High Score: ' + high_score_str, True,
-                                                 self.text_color, self.settings.bg_color)
+        self.high_score_image = self.text.render_number('High Score: ', high_score_str,
+                                                        self.text_color, self.settings.bg_color)
+
+        self.dirty = True
 
         # center the high score at the top of the screen
         self.high_score_rect = self.high_score_image.get_rect()
@@ -58,7 +65,9 @@ class Scoreboard:
     def prep_level(self):
         """Turn the level into a rendered image"""
         level_str = str(self.stats.level)
-        self.level_image = self.font.render('Level: ' + level_str, True, self.text_color, self.settings.bg_color)
+        self.level_image = self.text.render_number('Level: ', level_str, self.text_color, self.settings.bg_color)
+
+        self.dirty = True
 
         # position the level below the score
         self.level_rect = self.level_image.get_rect()
@@ -67,18 +76,23 @@ class Scoreboard:
 
     def prep_ships(self):
         """show how many ships are left"""
-        self.ships = Group()
-        for ship_number in range(self.stats.ships_left):
-            ship = Ship(self.ai_game)
-            ship.rect.x = 10 + ship_number * ship.rect.width
-            ship.rect.y = 10
-            self.ships.add(ship)
+        ship_width = self.ship_image.get_width()
+        self.ship_positions = [(10 + ship_number * ship_width, 10)
+                               for ship_number in range(self.stats.ships_left)]
+        self.dirty = True
+
+    def rects(self):
+        """Return the rects the scoreboard covers"""
+        ship_size = self.ship_image.get_size()
+        return ([self.score_rect, self.high_score_rect, self.level_rect]
+                + [pygame.Rect(pos, ship_size) for pos in self.ship_positions])
 
     def show_score(self):
-        """Draw the scores, level and remaining ships on the screen"""
+        """Draw the scores, level and remaining ships on the screen, return the rects drawn to"""
         self.screen.blit(self.score_image, self.score_rect)
         self.screen.blit(self.high_score_image, self.high_score_rect)
         self.screen.blit(self.level_image, self.level_rect)
-        self.ships.draw(self.screen)
+        self.screen.blits([(self.ship_image, pos) for pos in self.ship_positions], doreturn=False)
+        return self.rects()
 
 
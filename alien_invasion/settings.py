@@ -1,14 +1,113 @@
+import sys
+import json
+import warnings
+
+import pygame
+
+# settings that are None by default, with the type they have when they are set
+OPTIONAL = {'fleet_rows': int, 'record_path': str, 'profile_export_path': str, 'telemetry_port': int}
+
+# settings that must be one of a few values
+CHOICES = {
+    'display_mode': ('fullscreen', 'windowed'),
+    'render_mode': ('dirty', 'full'),
+    'collision_mode': ('grid', 'hash'),
+    'fleet_draw_mode': ('layer', 'sprites'),
+}
+
+# what key_bindings and gamepad_buttons can bind to
+ACTIONS = ('left', 'right', 'fire', 'quit', 'play')
+
+# the smallest value a number may take
+MINIMUMS = {
+    'screen_width': 1, 'screen_height': 1, 'tick_rate': 1, 'max_frame_time': 0.0, 'respawn_pause': 0.0,
+    'level_pause': 0.0, 'game_over_pause': 0.0, 'idle_frame_rate': 1, 'text_cache_size': 1,
+    'gamepad_deadzone': 0.0, 'latency_samples': 1, 'leaderboard_size': 1, 'replay_snapshot_interval': 1,
+    'profile_max_frames': 1, 'telemetry_port': 0, 'telemetry_interval': 1, 'reload_interval': 0.0,
+    'ship_limit': 0, 'bullet_width': 1, 'bullet_height': 1, 'bullets_allowed': 0, 'bullet_pool_size': 0,
+    'fleet_drop_speed': 0, 'alien_scale': 0.01, 'fleet_rows': 1, 'alien_pool_size': 0, 'speedup_scale': 0.0,
+    'score_scale': 0.0, 'level_table_size': 1, 'base_ship_speed': 0.0, 'base_bullet_speed': 0.0,
+    'base_alien_speed': 0.0, 'base_alien_points': 0, 'particle_limit': 0, 'particles_per_explosion': 0,
+    'particle_life': 0.0, 'particle_speed': 0.0, 'particle_size': 1, 'particle_frame_budget': 0.0,
+}
+
+# settings worked out while the game runs, a settings file can't set them
+DERIVED = ('config_path', 'restart_values', 'level_table', 'ship_speed', 'bullet_speed', 'alien_speed',
+           'fleet_direction', 'alien_points')
+
+# settings that are only read when the game starts, a reload leaves them for the next start
+RESTART_REQUIRED = (
+    'screen_width', 'screen_height', 'display_mode', 'scale_to_display', 'vsync', 'tick_rate',
+    'text_cache_size', 'latency_samples', 'score_file', 'leaderboard_size', 'record_path',
+    'replay_snapshot_interval', 'profile', 'profile_max_frames', 'hot_reload', 'telemetry_host',
+    'telemetry_port', 'bullet_width',
+    'bullet_height', 'bullet_color', 'bullet_pool_size', 'alien_scale', 'alien_pool_size', 'particle_limit',
+)
+
+
+class SettingsError(ValueError):
+    """Raised when a settings file can't be read or has settings that don't check out"""
+
 
 class Settings():
     """A class to store all settings for the game"""
 
     def __init__(self):
         """Initialize the game's static settings"""
-        # screen settings
+        # screen settings, with scale_to_display this is the logical resolution the game runs at
         self.screen_width = 1200
         self.screen_height = 750
         self.bg_color = (230, 230, 230)
 
+        # display settings
+        self.display_mode = 'fullscreen'   # 'fullscreen' or 'windowed'
+        self.scale_to_display = True   # False runs at the display's native resolution instead
+        self.vsync = False   # only available when scaling to the display
+
+        # simulation settings
+        self.tick_rate = 120   # fixed number of simulation ticks per second
+        self.max_frame_time = 0.25   # longest frame (in seconds) we try to catch up on
+
+        # pauses in seconds, they are timed states of the game loop
+        self.respawn_pause = 0.5   # after the ship is hit
+        self.level_pause = 0.5   # before a new wave starts moving
+        self.game_over_pause = 1.0   # before going back to the menu
+        self.skip_pauses = False   # for simulations with nobody watching
+
+        # rendering settings
+        self.render_mode = 'dirty'   # 'dirty' pushes only the changed rects, 'full' redraws and flips every frame
+        self.idle_frame_rate = 30   # frame cap while waiting on the Play screen
+        self.text_cache_size = 64   # rendered text labels kept before the least recently used is dropped
+
+        # input settings, keys are pygame key names and gamepad buttons are button numbers
+        self.key_bindings = {'left': 'left', 'right': 'right', 'space': 'fire', 'q': 'quit'}
+        self.gamepad_buttons = {0: 'fire', 7: 'play'}   # A fires and Start plays on most pads
+        self.gamepad_deadzone = 0.5   # how far the stick has to be pushed before the ship moves
+        self.latency_samples = 1000   # input to display latencies kept for the report
+
+        # score persistence
+        self.score_file = 'high_score.json'
+        self.leaderboard_size = 10   # best games kept in the score file
+
+        # recording settings
+        self.record_path = None   # file to record every tick's input to, None means don't record
+        self.replay_snapshot_interval = 600   # ticks between state snapshots when replaying
+
+        # profiling settings
+        self.profile = False   # time every part of the game loop
+        self.profile_overlay = False   # draw the timings on screen while playing
+        self.profile_export_path = None   # .csv, .json or .trace.json file written when quitting
+        self.profile_max_frames = 100000   # older frames are dropped
+
+        # telemetry settings, the game state is streamed to local clients, see telemetry.py
+        self.telemetry_host = '127.0.0.1'
+        self.telemetry_port = None   # None means no telemetry server, 0 picks a free port
+        self.telemetry_interval = 1   # ticks between telemetry messages
+
+        # settings file, see load()
+        self.hot_reload = False   # watch the settings file and apply changes while the game runs
+        self.reload_interval = 1.0   # seconds between checks of the settings file
+
         # Ship settings
         self.ship_limit = 3
 
@@ -17,9 +116,31 @@ class Settings():
         self.bullet_height = 15
         self.bullet_color = (60, 60, 60)
         self.bullets_allowed = 5
+        self.bullet_pool_size = 16   # bullets created up front, the pool grows past this if needed
 
         # alien fleet settings
         self.fleet_drop_speed = 8
+        self.alien_scale = 1.0   # size of the alien sprite relative to alien.bmp
+        self.fleet_rows = None   # number of rows in the fleet, None fits as many as the screen allows
+        self.alien_pool_size = 256   # alien slots allocated up front, the fleet grows past this if needed
+        # 'grid' finds hit aliens by index arithmetic on the rigid fleet, 'hash' through a spatial hash
+        self.collision_mode = 'grid'
+        # 'layer' draws the fleet from one cached surface, 'sprites' blits every alien on its own
+        self.fleet_draw_mode = 'layer'
+
+        # explosion settings, particles fly out of every alien that is shot down
+        self.particle_limit = 2000   # most particles alive at once, 0 turns explosions off
+        self.particles_per_explosion = 24
+        self.particle_life = 0.5   # longest a particle lasts, in seconds
+        self.particle_speed = 1.5   # fastest a particle flies, in pixels per tick
+        self.particle_size = 2   # particles are squares this many pixels wide
+        self.particle_frame_budget = 0.002   # seconds a frame may spend on particles before fewer are made
+
+        # speeds and points on the first level
+        self.base_ship_speed = 1.5
+        self.base_bullet_speed = 3.0
+        self.base_alien_speed = 0.4
+        self.base_alien_points = 50
 
         # how quickly the game speeds up
         self.speedup_scale = 1.1
@@ -27,24 +148,161 @@ class Settings():
         # how quickly the alien point values increase
         self.score_scale = 1.5
 
+        self.level_table_size = 100   # levels worked out when a game starts, later ones when they are reached
+
+        self.config_path = None   # the settings file these settings came from, see load()
+        self.restart_values = {}   # the RESTART_REQUIRED settings as the file last gave them, see reload()
         self.initialize_dynamic_settings()
 
     def initialize_dynamic_settings(self):
         """initialize the settings that can change throughout the game"""
-        self.ship_speed = 1.5
-        self.bullet_speed = 3.0
-        self.alien_speed = 0.4
-
         # fleet direction of 1 represents right; -1 represents left
         self.fleet_direction = 1
 
-        # scoring
-        self.alien_points = 50
+        # the table is rebuilt on every start so it picks up settings changed since the last game
+        self.build_level_table()
+        self.set_level(1)
+
+    def build_level_table(self):
+        """Work out the speeds and points of the first level_table_size levels"""
+        self.level_table = [self.level_values(level) for level in range(1, self.level_table_size + 1)]
+
+    def level_values(self, level):
+        """Return the speeds and points of a level, worked out from the first level's values"""
+        speedup = self.speedup_scale ** (level - 1)
+        return {
+            'ship_speed': self.base_ship_speed * speedup,
+            'bullet_speed': self.base_bullet_speed * speedup,
+            'alien_speed': self.base_alien_speed * speedup,
+            'alien_points': int(self.base_alien_points * self.score_scale ** (level - 1)),
+        }
+
+    def set_level(self, level):
+        """Switch the speeds and points to those of a level"""
+        if level <= len(self.level_table):
+            values = self.level_table[level - 1]
+        else:
+            values = self.level_values(level)
+        for name, value in values.items():
+            setattr(self, name, value)
+
+    @classmethod
+    def load(cls, path):
+        """Return the default settings with the values of a json settings file laid over them"""
+        settings = cls()
+        settings.config_path = path
+        settings.update(settings.read(path))
+        settings.restart_values = {name: getattr(settings, name) for name in RESTART_REQUIRED}
+        return settings
+
+    def read(self, path):
+        """Read a json settings file, return its values once they have all been checked"""
+        try:
+            with open(path) as f:
+                values = json.load(f)
+        except (OSError, ValueError) as error:
+            raise SettingsError(f"can't read {path}: {error}") from error
+        if not isinstance(values, dict):
+            raise SettingsError(f"{path} should hold a json object of settings")
+        return self.check(values)
+
+    def check(self, values):
+        """
+        Return the values converted to the types of the settings they are for,
+        raise SettingsError listing every value that is unknown, of the wrong type or out of range
+        """
+        checked = {}
+        errors = []
+        for name, value in values.items():
+            if name in DERIVED or name not in vars(self):
+                errors.append(f"{name} is not a setting that can be set")
+                continue
+            if value is None and name in OPTIONAL:
+                checked[name] = None
+                continue
+            try:
+                checked[name] = self._convert(name, value)
+            except (TypeError, ValueError) as error:
+                errors.append(f"{name}: {error}")
+        if errors:
+            raise SettingsError('; '.join(errors))
+        return checked
+
+    def _convert(self, name, value):
+        """Return the value as the type of the setting, json has no tuples or int dict keys"""
+        default = getattr(self, name)
+        kind = OPTIONAL.get(name, type(default))
+        if kind is float and type(value) is int:
+            value = float(value)
+        elif kind is tuple and isinstance(value, list):
+            value = tuple(value)
+        elif kind is dict and isinstance(value, dict):
+            key_kind = type(next(iter(default), ''))
+            value = {key_kind(key): action for key, action in value.items()}
+
+        # bool is an int in python, but a setting that wants a number shouldn't take true
+        if type(value) is not kind:
+            raise TypeError(f"should be {kind.__name__}, not {value!r}")
+        if kind is tuple and (len(value) != 3 or not all(type(c) is int and 0 <= c <= 255 for c in value)):
+            raise ValueError(f"should be an (r, g, b) color, not {value!r}")
+        if name in CHOICES and value not in CHOICES[name]:
+            raise ValueError(f"should be one of {', '.join(CHOICES[name])}, not {value!r}")
+        if name in MINIMUMS and value < MINIMUMS[name]:
+            raise ValueError(f"should be at least {MINIMUMS[name]}, not {value!r}")
+        if kind is dict:
+            self._check_bindings(name, value)
+        return value
+
+    def _check_bindings(self, name, bindings):
+        """Raise ValueError if a binding has an unknown action or, for key_bindings, an unknown key name"""
+        for key, action in bindings.items():
+            if action not in ACTIONS:
+                raise ValueError(f"{key!r} should be bound to one of {', '.join(ACTIONS)}, not {action!r}")
+            if name == 'key_bindings':
+                # pygame warns that it isn't started yet, key names don't need it
+                with warnings.catch_warnings():
+                    warnings.simplefilter('ignore')
+                    try:
+                        pygame.key.key_code(key)
+                    except ValueError:
+                        raise ValueError(f"{key!r} is not a pygame key name") from None
+
+    def update(self, values):
+        """Apply checked values, return the names of the settings that changed"""
+        changed = [name for name, value in values.items() if getattr(self, name) != value]
+        for name in changed:
+            setattr(self, name, values[name])
+        return changed
+
+    def reload(self):
+        """
+        Read the settings file again and apply everything that can change while the game runs,
+        settings missing from the file go back to their defaults, return the names that changed
+        """
+        defaults = type(self)()
+        values = {name: value for name, value in vars(defaults).items() if name not in DERIVED}
+        values.update(self.read(self.config_path))
+
+        # compared with the file and not the running settings, the game changes some of them itself,
+        # like the screen size when it runs at the display's resolution
+        last = {name: self.restart_values.get(name, getattr(self, name)) for name in RESTART_REQUIRED}
+        waiting = [name for name in RESTART_REQUIRED if values[name] != last[name]]
+        self.restart_values = {name: values[name] for name in RESTART_REQUIRED}
+        if waiting:
+            print(f"{', '.join(waiting)} will change when the game is restarted")
+        changed = self.update({name: value for name, value in values.items() if name not in RESTART_REQUIRED})
+
+        # the level table follows the new values straight away, not just on the next start
+        self.build_level_table()
+        return changed
+
+    def save(self, path):
+        """Write every setting a settings file can hold to path, as a starting point for a settings file"""
+        values = {name: value for name, value in vars(self).items() if name not in DERIVED}
+        with open(path, 'w') as f:
+            json.dump(values, f, indent=4)
 
-    def increase_speed(self):
-        """increase speed settings for every level"""
-        self.ship_speed *= self.speedup_scale
-        self.bullet_speed *= self.speedup_scale
-        self.alien_speed *= self.speedup_scale
 
-        self.alien_points = int(self.score_scale * self.score_scale)
+if __name__ == '__main__':
+    # python settings.py settings.json writes the defaults out to edit
+    Settings().save(sys.argv[1] if len(sys.argv) > 1 else 'settings.json')
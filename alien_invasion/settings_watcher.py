@@ -0,0 +1,46 @@
+import os
+from time import perf_counter
+
+from settings import SettingsError
+
+class SettingsWatcher:
+    """
+    A class to watch the settings file and apply changes to the running game,
+    the file's modification time is checked every Settings.reload_interval seconds
+    """
+
+    def __init__(self, ai_game):
+        """Initialize the watcher with the file as it is now"""
+        self.ai_game = ai_game
+        self.settings = ai_game.settings
+        self.path = self.settings.config_path
+        self.mtime = self._mtime()
+        self.next_check = perf_counter() + self.settings.reload_interval
+
+    def _mtime(self):
+        """Return the modification time of the settings file, or None if it is missing"""
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def check(self):
+        """Reload the settings if the file changed since the last check"""
+        now = perf_counter()
+        if now < self.next_check:
+            return
+        self.next_check = now + self.settings.reload_interval
+
+        mtime = self._mtime()
+        if mtime is None or mtime == self.mtime:
+            return
+        self.mtime = mtime
+
+        # a file with mistakes in it is ignored as a whole, the game keeps the settings it has
+        try:
+            changed = self.settings.reload()
+        except SettingsError as error:
+            print(f"not reloading {self.path}: {error}")
+            return
+        if changed:
+            self.ai_game.settings_changed(changed)
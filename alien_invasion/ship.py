@@ -1,4 +1,3 @@
-import pygame
 from pygame.sprite import Sprite
 
 class Ship(Sprite):
@@ -11,8 +10,8 @@ class Ship(Sprite):
         self.settings = ai_game.settings  # importing the game settings
         self.screen_rect = ai_game.screen.get_rect()   # every object is considered a rectangle, including the screen
 
-        # load the ship image and get its rectangle
-        self.image = pygame.image.load('images/ship.bmp')
+        # get the shared ship image and its rectangle
+        self.image = ai_game.assets.image('images/ship.bmp')
         self.rect = self.image.get_rect()    # ship image is turned into a rectangle
 
         # start each new ship at the bottom of the screen
@@ -20,22 +19,27 @@ class Ship(Sprite):
 
         # store the decimal value for the ship'' horizontal position
         self.x = float(self.rect.x)
+        self.prev_x = self.x   # position at the previous tick, used to interpolate drawing
 
         # movement flags
         self.moving_right = False
         self.moving_left = False
 
-    def blitme(self):
-        """Draw the ship at its current location"""
-        self.screen.blit(self.image, self.rect)
+    def blitme(self, alpha=1.0):
+        """Draw the ship between its last two tick positions, alpha is the fraction of a tick elapsed"""
+        draw_rect = self.rect.copy()
+        draw_rect.x = round(self.prev_x + (self.x - self.prev_x) * alpha)
+        return self.screen.blit(self.image, draw_rect)
 
     def center_ship(self):
         """center the ship on the screen"""
         self.rect.midbottom = self.screen_rect.midbottom
         self.x = float(self.rect.x)
+        self.prev_x = self.x
 
     def update(self):
         """Update the ship's position based on movement flags"""
+        self.prev_x = self.x
         # update the ship's x value, not the rect
         if self.moving_right and self.rect.right < self.screen_rect.right:  # respecting screen boundaries
             self.x += self.settings.ship_speed
@@ -0,0 +1,377 @@
+import json
+import socket
+import struct
+import asyncio
+import argparse
+import threading
+
+import numpy as np
+
+from game_state import MENU, PLAYING, RESPAWN_PAUSE, GAME_OVER, LEVEL_TRANSITION
+
+# every message is its payload length, its kind and the tick it describes, then the payload,
+# the length is 4 bytes since a keyframe of a big fleet with hundreds of bullets can pass 64KB
+MESSAGE = struct.Struct('<IBI')
+INFO = 0   # json with the sizes a client needs to draw the game, sent once on connecting
+KEYFRAME = 1   # every field, the client starts over from this
+DELTA = 2   # only the fields that changed since the last message
+
+# a delta starts with a mask of the fields that follow, in this order
+FIELDS = struct.Struct('<H')
+SHIP = 1
+SCORE = 2
+LEVEL = 4
+SHIPS_LEFT = 8
+STATE = 16
+OFFSET = 32
+GRID = 64   # rows, columns and the whole alive bitmap, sent for a new wave
+KILLS = 128   # the aliens killed since the last message
+BULLETS = 256
+
+SHIP_X = struct.Struct('<h')
+SCORE_VALUE = struct.Struct('<I')
+LEVEL_VALUE = struct.Struct('<H')
+COUNT = struct.Struct('<B')
+BULLET_COUNT = struct.Struct('<H')
+POINT = struct.Struct('<hh')
+GRID_SIZE = struct.Struct('<HH')
+INDEX = struct.Struct('<H')
+MAX_INDEX = 0xFFFF   # a fleet with more slots than INDEX can number always sends its whole bitmap
+
+STATES = (MENU, PLAYING, RESPAWN_PAUSE, GAME_OVER, LEVEL_TRANSITION)
+
+# bullets past this many are left out of a message, the count has to fit in BULLET_COUNT
+MAX_BULLETS = 0xFFFF
+
+# a client that falls this far behind is dropped until the next keyframe
+MAX_BUFFERED = 64 * 1024
+
+
+def capture(ai_game):
+    """Return the state streamed to clients, ints only so it packs exactly"""
+    fleet = ai_game.aliens
+    stats = ai_game.stats
+    return {
+        'ship': ai_game.ship.rect.x,
+        'score': stats.score,
+        'level': stats.level,
+        'ships_left': stats.ships_left,
+        'state': STATES.index(ai_game.state.state),
+        'offset': (fleet.left, fleet.top),
+        'grid': (fleet.number_rows, fleet.number_aliens_x),
+        'alive': fleet.alive.copy(),
+        'bullets': tuple((bullet.rect.x, bullet.rect.y) for bullet in ai_game.bullets),
+    }
+
+
+def encode(previous, state):
+    """Return the payload carrying what changed from previous to state, everything when previous is None"""
+    fields = 0
+    parts = []
+    if previous is None or state['ship'] != previous['ship']:
+        fields |= SHIP
+        parts.append(SHIP_X.pack(state['ship']))
+    if previous is None or state['score'] != previous['score']:
+        fields |= SCORE
+        parts.append(SCORE_VALUE.pack(state['score']))
+    if previous is None or state['level'] != previous['level']:
+        fields |= LEVEL
+        parts.append(LEVEL_VALUE.pack(state['level']))
+    if previous is None or state['ships_left'] != previous['ships_left']:
+        fields |= SHIPS_LEFT
+        parts.append(COUNT.pack(state['ships_left']))
+    if previous is None or state['state'] != previous['state']:
+        fields |= STATE
+        parts.append(COUNT.pack(state['state']))
+    if previous is None or state['offset'] != previous['offset']:
+        fields |= OFFSET
+        parts.append(POINT.pack(*state['offset']))
+
+    alive = state['alive']
+    if previous is None or state['grid'] != previous['grid']:
+        fields |= GRID
+        parts.append(GRID_SIZE.pack(*state['grid']) + np.packbits(alive).tobytes())
+    elif not np.array_equal(alive, previous['alive']):
+        # aliens only die within a wave, so the indices of the dead are usually shorter than the bitmap
+        killed = np.flatnonzero(previous['alive'] & ~alive)
+        born = np.count_nonzero(alive & ~previous['alive'])
+        if born or alive.size > MAX_INDEX + 1 or killed.size > 255 or killed.size * INDEX.size > alive.size // 8:
+            fields |= GRID
+            parts.append(GRID_SIZE.pack(*state['grid']) + np.packbits(alive).tobytes())
+        else:
+            fields |= KILLS
+            parts.append(COUNT.pack(killed.size) + killed.astype('<u2').tobytes())
+
+    if previous is None or state['bullets'] != previous['bullets']:
+        fields |= BULLETS
+        bullets = state['bullets'][:MAX_BULLETS]
+        parts.append(BULLET_COUNT.pack(len(bullets)) + b''.join(POINT.pack(*xy) for xy in bullets))
+    return FIELDS.pack(fields) + b''.join(parts)
+
+
+def decode(state, payload):
+    """Apply a payload to the state dict a client keeps, return the state"""
+    fields, = FIELDS.unpack_from(payload)
+    offset = FIELDS.size
+    if fields & SHIP:
+        state['ship'], = SHIP_X.unpack_from(payload, offset)
+        offset += SHIP_X.size
+    if fields & SCORE:
+        state['score'], = SCORE_VALUE.unpack_from(payload, offset)
+        offset += SCORE_VALUE.size
+    if fields & LEVEL:
+        state['level'], = LEVEL_VALUE.unpack_from(payload, offset)
+        offset += LEVEL_VALUE.size
+    if fields & SHIPS_LEFT:
+        state['ships_left'], = COUNT.unpack_from(payload, offset)
+        offset += COUNT.size
+    if fields & STATE:
+        state['state'], = COUNT.unpack_from(payload, offset)
+        offset += COUNT.size
+    if fields & OFFSET:
+        state['offset'] = POINT.unpack_from(payload, offset)
+        offset += POINT.size
+    if fields & GRID:
+        state['grid'] = GRID_SIZE.unpack_from(payload, offset)
+        offset += GRID_SIZE.size
+        count = state['grid'][0] * state['grid'][1]
+        size = (count + 7) // 8
+        bits = np.frombuffer(payload, dtype=np.uint8, count=size, offset=offset)
+        state['alive'] = np.unpackbits(bits, count=count).astype(bool)
+        offset += size
+    if fields & KILLS:
+        count, = COUNT.unpack_from(payload, offset)
+        offset += COUNT.size
+        killed = np.frombuffer(payload, dtype='<u2', count=count, offset=offset)
+        state['alive'][killed] = False
+        offset += count * INDEX.size
+    if fields & BULLETS:
+        count, = BULLET_COUNT.unpack_from(payload, offset)
+        offset += BULLET_COUNT.size
+        state['bullets'] = tuple(POINT.unpack_from(payload, offset + i * POINT.size) for i in range(count))
+    return state
+
+
+def message(kind, tick, payload):
+    """Frame a payload for the stream"""
+    return MESSAGE.pack(len(payload), kind, tick) + payload
+
+
+class TelemetryServer:
+    """
+    A class to stream the game state to any number of local clients,
+    the sockets are served by an asyncio loop on a background thread so the game loop never waits on them
+    """
+
+    def __init__(self, ai_game):
+        """Start listening on Settings.telemetry_host and telemetry_port"""
+        self.ai_game = ai_game
+        self.settings = ai_game.settings
+        self.previous = None   # the state the last message was encoded against
+        self.keyframe_wanted = False   # set by the loop thread when a client needs a full state
+
+        # only changed on the loop thread
+        self.clients = set()   # writers receiving every message
+        self.waiting = set()   # writers that get the stream from the next keyframe on
+
+        self.loop = asyncio.new_event_loop()
+        self.ready = threading.Event()
+        self.thread = threading.Thread(target=self._serve, name='telemetry', daemon=True)
+        self.error = None
+        self.thread.start()
+        self.ready.wait()
+        if self.error:
+            raise self.error
+
+    def _serve(self):
+        """Run the asyncio loop that accepts clients and writes to them"""
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.server = self.loop.run_until_complete(asyncio.start_server(
+                self._connected, self.settings.telemetry_host, self.settings.telemetry_port))
+        except OSError as error:
+            self.error = error   # raised on the game's thread, e.g. when the port is taken
+            self.ready.set()
+            return
+        self.port = self.server.sockets[0].getsockname()[1]   # the real port when 0 was asked for
+        self.ready.set()
+        self.loop.run_forever()
+
+    async def _connected(self, reader, writer):
+        """Greet a new client and ask the game for a keyframe to start it off"""
+        fleet = self.ai_game.aliens
+        info = {
+            'screen_width': self.settings.screen_width, 'screen_height': self.settings.screen_height,
+            'bg_color': self.settings.bg_color, 'alien_width': fleet.alien_width,
+            'alien_height': fleet.alien_height, 'ship_width': self.ai_game.ship.rect.width,
+            'ship_height': self.ai_game.ship.rect.height, 'ship_y': self.ai_game.ship.rect.y,
+            'bullet_width': self.settings.bullet_width, 'bullet_height': self.settings.bullet_height,
+            'bullet_color': self.settings.bullet_color, 'tick_rate': self.settings.tick_rate,
+        }
+        writer.write(message(INFO, 0, json.dumps(info).encode()))
+        self.waiting.add(writer)
+        self.keyframe_wanted = True
+
+        # clients never send anything, reading just tells us when they hang up
+        try:
+            await reader.read()
+        except ConnectionError:
+            pass
+        self.clients.discard(writer)
+        self.waiting.discard(writer)
+        writer.close()
+
+    def publish(self):
+        """Encode the state of the tick that just ran and hand it to the loop thread, called by the game loop"""
+        if not self.clients and not self.waiting and not self.keyframe_wanted:
+            self.previous = None
+            return
+        state = capture(self.ai_game)
+        keyframe = self.keyframe_wanted or self.previous is None
+        if keyframe:
+            self.keyframe_wanted = False
+            data = message(KEYFRAME, self.ai_game.ticks, encode(None, state))
+        else:
+            data = message(DELTA, self.ai_game.ticks, encode(self.previous, state))
+        self.previous = state
+        self.loop.call_soon_threadsafe(self._broadcast, data, keyframe)
+
+    def _broadcast(self, data, keyframe):
+        """Write a message to every client, on the loop thread"""
+        if keyframe:
+            self.clients |= self.waiting
+            self.waiting.clear()
+        for writer in list(self.clients):
+            if writer.is_closing():
+                self.clients.discard(writer)
+            elif writer.transport.get_write_buffer_size() > MAX_BUFFERED:
+                # a client that can't keep up skips ahead to the next keyframe instead of slowing the game
+                self.clients.discard(writer)
+                self.waiting.add(writer)
+                self.keyframe_wanted = True
+            else:
+                writer.write(data)
+
+    async def _shutdown(self):
+        """Hang up on every client and wait for their handlers to finish"""
+        self.server.close()
+        for writer in self.clients | self.waiting:
+            writer.close()
+        # closing a writer ends its reader, so the handlers return on their own
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        if tasks:
+            await asyncio.wait(tasks, timeout=0.5)
+
+    def close(self):
+        """Stop serving and hang up on every client"""
+        try:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self.loop).result(timeout=1.0)
+        finally:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join(timeout=1.0)
+
+
+class TelemetryClient:
+    """A class to receive the stream of a running game, record it and keep the decoded state"""
+
+    def __init__(self, host, port, record_path=None):
+        """Connect to a game"""
+        self.socket = socket.create_connection((host, port))
+        self.stream = self.socket.makefile('rb')
+        self.record = open(record_path, 'wb') if record_path else None
+        self.info = None
+        self.state = None
+        self.tick = 0
+        self.bytes = 0
+
+    def receive(self):
+        """Read the next message and apply it, return False when the game hung up"""
+        header = self.stream.read(MESSAGE.size)
+        if len(header) < MESSAGE.size:
+            return False
+        length, kind, self.tick = MESSAGE.unpack(header)
+        payload = self.stream.read(length)
+        if len(payload) < length:
+            return False
+        self.bytes += MESSAGE.size + length
+        if self.record:
+            self.record.write(header + payload)
+
+        if kind == INFO:
+            self.info = json.loads(payload)
+        elif kind == KEYFRAME:
+            self.state = decode({}, payload)
+        elif self.state is not None:
+            decode(self.state, payload)
+        return True
+
+    def draw(self, screen):
+        """Draw the last state received with plain rectangles"""
+        import pygame
+
+        info, state = self.info, self.state
+        screen.fill(info['bg_color'])
+        width, height = info['alien_width'], info['alien_height']
+        left, top = state['offset']
+        columns = max(state['grid'][1], 1)
+        for index in np.flatnonzero(state['alive']).tolist():
+            row, col = divmod(index, columns)
+            rect = (width + 2 * width * col + left, height + 2 * height * row + top, width, height)
+            pygame.draw.rect(screen, (60, 160, 60), rect)
+        for x, y in state['bullets']:
+            pygame.draw.rect(screen, info['bullet_color'], (x, y, info['bullet_width'], info['bullet_height']))
+        pygame.draw.rect(screen, (60, 60, 160), (state['ship'], info['ship_y'], info['ship_width'],
+                                                 info['ship_height']))
+
+    def close(self):
+        """Hang up and finish the recording"""
+        self.socket.close()
+        if self.record:
+            self.record.close()
+
+
+def watch(client, window):
+    """Show the stream in a window, or print a line a second without one, until the game hangs up"""
+    screen = None
+    if window:
+        import pygame
+        pygame.display.init()
+    last_report = None
+    last_bytes = 0
+    while client.receive():
+        if client.state is None:
+            continue
+        if window:
+            if screen is None:
+                screen = pygame.display.set_mode((client.info['screen_width'], client.info['screen_height']))
+                pygame.display.set_caption("Alien Invasion telemetry")
+            if pygame.event.peek(pygame.QUIT):
+                break
+            pygame.event.pump()
+            client.draw(screen)
+            pygame.display.flip()
+        elif last_report is None:
+            last_report, last_bytes = client.tick, client.bytes
+        elif client.tick - last_report >= client.info['tick_rate']:
+            state = client.state
+            print(f"tick {client.tick}  score {state['score']}  level {state['level']}  "
+                  f"ships {state['ships_left']}  aliens {int(np.count_nonzero(state['alive']))}  "
+                  f"{(client.bytes - last_bytes) / (client.tick - last_report):.1f} bytes/tick")
+            last_report, last_bytes = client.tick, client.bytes
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Watch or record the telemetry stream of a running game")
+    parser.add_argument('address', help="host:port of the game, see Settings.telemetry_port")
+    parser.add_argument('--record', help="file to save the raw stream to")
+    parser.add_argument('--no-window', action='store_true', help="print a summary line a second instead")
+    args = parser.parse_args()
+
+    host, _, port = args.address.rpartition(':')
+    client = TelemetryClient(host or '127.0.0.1', int(port), args.record)
+    try:
+        watch(client, not args.no_window)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        client.close()
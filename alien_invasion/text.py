@@ -0,0 +1,90 @@
+from collections import OrderedDict
+
+import pygame.font
+
+class TextRenderer:
+    """
+    A class to render text for the scoreboard and buttons,
+    fonts are looked up once, rendered labels are kept in an LRU cache
+    and numbers are composed from a pre-rendered atlas of digit glyphs
+    """
+
+    # characters a formatted number can contain
+    GLYPHS = '0123456789,'
+
+    def __init__(self, settings):
+        """Initialize the font, label and glyph caches"""
+        self.settings = settings
+        self.fonts = {}
+        self.labels = OrderedDict()
+        self.atlases = {}
+
+        # cache statistics
+        self.hits = 0
+        self.misses = 0
+
+    def font(self, size):
+        """
+        Return the default font at the given size, loaded the first time it is asked for,
+        this is the font SysFont(None) ends up with but without SysFont scanning every system font first
+        """
+        if size not in self.fonts:
+            if not pygame.font.get_init():
+                pygame.font.init()
+            self.fonts[size] = pygame.font.Font(None, size)
+        return self.fonts[size]
+
+    def render(self, text, color, bg_color=None, size=48):
+        """Return a rendered label, from the cache when it was rendered before"""
+        key = (text, color, bg_color, size)
+        if key in self.labels:
+            self.hits += 1
+            self.labels.move_to_end(key)
+            return self.labels[key]
+
+        self.misses += 1
+        image = self.font(size).render(text, True, color, bg_color)
+        self.labels[key] = image
+        if len(self.labels) > self.settings.text_cache_size:
+            self.labels.popitem(last=False)   # evict the least recently used label
+        return image
+
+    def _atlas(self, color, bg_color, size):
+        """Return the glyph atlas and each glyph's area in it, building it on first use"""
+        key = (color, bg_color, size)
+        if key not in self.atlases:
+            glyphs = [self.font(size).render(char, True, color, bg_color) for char in self.GLYPHS]
+            height = max(glyph.get_height() for glyph in glyphs)
+            atlas = pygame.Surface((sum(glyph.get_width() for glyph in glyphs), height))
+            areas = {}
+            x = 0
+            for char, glyph in zip(self.GLYPHS, glyphs):
+                atlas.blit(glyph, (x, 0))
+                areas[char] = pygame.Rect(x, 0, glyph.get_width(), height)
+                x += glyph.get_width()
+            self.atlases[key] = (atlas, areas)
+        return self.atlases[key]
+
+    def render_number(self, prefix, number_str, color, bg_color, size=48):
+        """
+        Return the prefix followed by a formatted number,
+        the prefix comes from the label cache and the digits are blitted from the glyph atlas
+        """
+        prefix_image = self.render(prefix, color, bg_color, size)
+        atlas, areas = self._atlas(color, bg_color, size)
+        height = max(prefix_image.get_height(), atlas.get_height())
+        width = prefix_image.get_width() + sum(areas[char].width for char in number_str)
+
+        image = pygame.Surface((width, height))
+        image.fill(bg_color)
+        image.blit(prefix_image, (0, 0))
+        x = prefix_image.get_width()
+        for char in number_str:
+            image.blit(atlas, (x, 0), areas[char])
+            x += areas[char].width
+        return image
+
+    def stats(self):
+        """Return the cache statistics as a dict"""
+        return {'hits': self.hits, 'misses': self.misses, 'labels': len(self.labels),
+                'fonts': len(self.fonts), 'atlases': len(self.atlases)}